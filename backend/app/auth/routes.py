@@ -1,10 +1,37 @@
-from flask import request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from ..models.models import db, User
-from .. import bcrypt
+from flask import request, jsonify, current_app
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token, jwt_required, get_jwt_identity, get_jwt
+)
+from ..models.models import db, User, RefreshToken
+from ..utils.passwords import hash_password, check_password, PasswordHasherBusy
+from ..utils.versions import versioned, bump_versions
 from . import auth_bp
 from sqlalchemy.exc import IntegrityError
-from datetime import timedelta
+from datetime import datetime, timedelta
+import uuid
+
+# ------------------- TOKEN HELPERS -------------------
+def issue_tokens(user_id, family_id=None):
+    """Create an access token and a recorded refresh token. Returns (access, refresh, RefreshToken row)."""
+    family_id = family_id or str(uuid.uuid4())
+    refresh_token = create_refresh_token(identity=str(user_id))
+    record = RefreshToken(
+        user_id=user_id,
+        jti=decode_token(refresh_token)['jti'],
+        family_id=family_id,
+        expires_at=datetime.utcnow() + current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    )
+    db.session.add(record)
+    return create_access_token(identity=str(user_id)), refresh_token, record
+
+def revoke_refresh_tokens(*criteria):
+    RefreshToken.query.filter(RefreshToken.revoked_at.is_(None), *criteria) \
+        .update({'revoked_at': datetime.utcnow()}, synchronize_session=False)
+
+def busy_response():
+    response = jsonify({'message': 'Server is busy, please try again in a moment'})
+    response.headers['Retry-After'] = '2'
+    return response, 503
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -14,7 +41,7 @@ def register():
         if User.query.filter_by(email=data.get('email')).first():
             return jsonify({'message': 'Email already registered'}), 400
         
-        hashed_password = bcrypt.generate_password_hash(data.get('password')).decode('utf-8')
+        hashed_password = hash_password(data.get('password'))
         
         partners = data.get('partners', [])
         if len(partners) > 10:
@@ -43,6 +70,9 @@ def register():
     except IntegrityError:
         db.session.rollback()
         return jsonify({'message': 'User already exists'}), 400
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
@@ -54,25 +84,78 @@ def login():
         
         user = User.query.filter_by(email=data.get('email')).first()
         
-        if not user or not bcrypt.check_password_hash(user.password, data.get('password')):
+        if not user or not check_password(user.password, data.get('password')):
             return jsonify({'message': 'Invalid email or password'}), 401
         
-        access_token = create_access_token(identity=str(user.id))
         # access_token = create_access_token(identity=str(user.id), expires_delta=timedelta(hours=8))
-
-        
+        access_token, refresh_token, _ = issue_tokens(user.id)
+        RefreshToken.query.filter(
+            RefreshToken.user_id == user.id,
+            RefreshToken.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
         
         return jsonify({
             'message': 'Login successful',
             'access_token': access_token,
+            'refresh_token': refresh_token,
             'user': user.to_dict()
         }), 200
         
+    except PasswordHasherBusy:
+        return busy_response()
     except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Swap a refresh token for a new access token and a new refresh token (rotation)."""
+    try:
+        jti = get_jwt()['jti']
+        record = db.session.query(RefreshToken).with_for_update().filter_by(jti=jti).first()
+        if not record:
+            return jsonify({'message': 'Invalid refresh token'}), 401
+
+        if record.revoked_at is not None:
+            # An already-rotated token came back: assume it was stolen and end the whole login
+            revoke_refresh_tokens(RefreshToken.family_id == record.family_id)
+            db.session.commit()
+            return jsonify({'message': 'Refresh token has been revoked'}), 401
+
+        access_token, refresh_token, replacement = issue_tokens(record.user_id, record.family_id)
+        record.revoked_at = datetime.utcnow()
+        record.replaced_by = replacement.jti
+        db.session.commit()
+
+        return jsonify({
+            'access_token': access_token,
+            'refresh_token': refresh_token
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(refresh=True)
+def logout():
+    """Revoke the refresh token's whole family, ending this login on this device."""
+    try:
+        record = RefreshToken.query.filter_by(jti=get_jwt()['jti']).first()
+        if record:
+            revoke_refresh_tokens(RefreshToken.family_id == record.family_id)
+            db.session.commit()
+        return jsonify({'message': 'Logged out successfully'}), 200
+
+    except Exception as e:
+        db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
+@versioned('profile')
 def get_profile():
     try:
         user_id = get_jwt_identity()
@@ -98,25 +181,31 @@ def update_profile():
         
         data = request.get_json()
         
-        if data.get('company_name'):
-            user.company_name = data.get('company_name')
-        if data.get('email'):
-            existing_user = User.query.filter_by(email=data.get('email')).first()
-            if existing_user and existing_user.id != user.id:
-                return jsonify({'message': 'Email already in use'}), 400
-            user.email = data.get('email')
-        if data.get('mobile'):
-            user.mobile = data.get('mobile')
-        if data.get('address'):
-            user.address = data.get('address')
-        if data.get('password'):
-            user.password = bcrypt.generate_password_hash(data.get('password')).decode('utf-8')
-        if 'partners' in data:
-            partners = data.get('partners', [])
-            if len(partners) > 10:
-                return jsonify({'message': 'Maximum 10 partners allowed'}), 400
-            user.partners = partners
-        
+        # No autoflush while assigning, so is_modified below still sees every changed column
+        with db.session.no_autoflush:
+            if data.get('company_name'):
+                user.company_name = data.get('company_name')
+            if data.get('email'):
+                existing_user = User.query.filter_by(email=data.get('email')).first()
+                if existing_user and existing_user.id != user.id:
+                    return jsonify({'message': 'Email already in use'}), 400
+                user.email = data.get('email')
+            if data.get('mobile'):
+                user.mobile = data.get('mobile')
+            if data.get('address'):
+                user.address = data.get('address')
+            if data.get('password'):
+                user.password = hash_password(data.get('password'))
+                # A new password signs out every other device
+                revoke_refresh_tokens(RefreshToken.user_id == user.id)
+            if 'partners' in data:
+                partners = data.get('partners', [])
+                if len(partners) > 10:
+                    return jsonify({'message': 'Maximum 10 partners allowed'}), 400
+                user.partners = partners
+        
+        if db.session.is_modified(user):
+            bump_versions(user.id, 'profile')
         db.session.commit()
         
         return jsonify({
@@ -124,6 +213,9 @@ def update_profile():
             'user': user.to_dict()
         }), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
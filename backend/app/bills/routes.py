@@ -1,16 +1,88 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models.models import db, Bill, BillItem, Merchant, AdhatiyaIncome, User
-from ..utils.helpers import generate_bill_number, calculate_bill_totals, calculate_adhatiya
+from ..utils.helpers import (
+    generate_bill_number, generate_bill_numbers, calculate_bill_totals, calculate_adhatiya,
+    business_date, encode_cursor, decode_cursor, parse_limit, parse_fieldset, amount_in_words
+)
+from ..utils.serializers import serialize_bills, serialize_bill, load_bill_items, BILL_FIELDS, BILL_INCLUDES
+from ..utils.ledger import lock_merchants, post_entry
+from ..utils.income import add_income_rows, delete_income_rows
+from ..utils.versions import versioned, bump_versions
+from ..utils.columnar import requested_format, columnar_fields, columnar_bills, columnar_response
+from ..utils.bill_import import parse_csv, parse_jsonl, normalize_bill, normalize_items
+from ..utils.print_render import bill_page_context, render_bill_pages
+from ..utils.escpos import render_escpos
+from collections import defaultdict
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, or_, and_, insert, select
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import RequestEntityTooLarge
+import hashlib
+import io
 from . import bills_bp
-from flask import render_template
+from flask import render_template, make_response, current_app, stream_template
 
 
 # ------------------- GET BILLS -------------------
+# Data versions behind bill responses; 'ledger' because the embedded merchants carry current_balance
+BILL_ENTITIES = ('bills', 'merchants', 'ledger')
+
+def bills_query(user_id, start_date=None, end_date=None, farmer_name=None, village_name=None, merchant_id=None):
+    """Select of the user's bills matching the list filters."""
+    query = select(Bill).where(Bill.user_id == user_id)
+
+    if start_date:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        query = query.where(Bill.created_at >= start)
+    if end_date:
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        query = query.where(Bill.created_at <= end)
+    if farmer_name:
+        query = query.where(Bill.farmer_name.ilike(f'%{farmer_name}%'))
+    if village_name:
+        query = query.where(Bill.village_name.ilike(f'%{village_name}%'))
+    if merchant_id:
+        query = query.where(Bill.merchant_id == merchant_id)
+    return query
+
+def count_query(query):
+    return select(func.count()).select_from(query.order_by(None).subquery())
+
+def bills_after(cursor):
+    """Keyset on (created_at, id): newest first, id breaks ties within the same timestamp. Raises ValueError."""
+    try:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        cursor_created_at = datetime.fromisoformat(cursor_created_at)
+        cursor_id = int(cursor_id)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    return or_(
+        Bill.created_at < cursor_created_at,
+        and_(Bill.created_at == cursor_created_at, Bill.id < cursor_id)
+    )
+
+def bills_page_query(query, limit, fields=None, include=None):
+    """Newest first, limit + 1 rows (to detect another page), only the requested columns."""
+    query = query.order_by(Bill.created_at.desc(), Bill.id.desc()).limit(limit + 1)
+    if fields is None:
+        return query
+    # Fetch only the requested columns, plus what the cursor and merchant include need;
+    # raiseload turns any stray access to another column into an error instead of a query
+    needed = {'id', 'created_at', *fields}
+    if include is None or 'merchant' in include:
+        needed.add('merchant_id')
+    return query.options(load_only(*(getattr(Bill, name) for name in BILL_FIELDS if name in needed), raiseload=True))
+
+def bills_page(bills, limit):
+    """Trim a limit + 1 fetch to the page: (bills, next_cursor)."""
+    has_more = len(bills) > limit
+    bills = bills[:limit]
+    return bills, encode_cursor(bills[-1].created_at, bills[-1].id) if has_more else None
+
 @bills_bp.route('/', methods=['GET'])
 @jwt_required()
+@versioned(*BILL_ENTITIES)
 def get_bills():
     try:
         user_id = get_jwt_identity()
@@ -19,28 +91,91 @@ def get_bills():
         farmer_name = request.args.get('farmer_name')
         village_name = request.args.get('village_name')
         merchant_id = request.args.get('merchant_id')
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
 
-        query = Bill.query.filter_by(user_id=user_id)
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            fmt = requested_format()
+            fields = parse_fieldset(request.args.get('fields'), BILL_FIELDS)
+            include = parse_fieldset(request.args.get('include'), BILL_INCLUDES, 'include', allow_empty=True)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        if fmt != 'json':
+            fields = columnar_fields(fields)
 
-        if start_date:
-            start = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(Bill.created_at >= start)
-        if end_date:
-            end = datetime.strptime(end_date, '%Y-%m-%d')
-            query = query.filter(Bill.created_at <= end)
-        if farmer_name:
-            query = query.filter(Bill.farmer_name.ilike(f'%{farmer_name}%'))
-        if village_name:
-            query = query.filter(Bill.village_name.ilike(f'%{village_name}%'))
-        if merchant_id:
-            query = query.filter(Bill.merchant_id == merchant_id)
+        query = bills_query(user_id, start_date, end_date, farmer_name, village_name, merchant_id)
 
-        bills = query.order_by(Bill.created_at.desc()).all()
-        return jsonify([bill.to_dict() for bill in bills]), 200
+        # Total is a separate COUNT over the filtered set, only when asked for
+        total = db.session.execute(count_query(query)).scalar() if include_total else None
+
+        if cursor:
+            try:
+                query = query.where(bills_after(cursor))
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+
+        bills = db.session.scalars(bills_page_query(query, limit, fields, include)).all()
+        bills, next_cursor = bills_page(bills, limit)
+
+        response = {
+            'next_cursor': next_cursor,
+            'limit': limit
+        }
+        if include_total:
+            response['total'] = total
+        if fmt != 'json':
+            return columnar_response(fmt, {**columnar_bills(bills, fields, include), **response})
+        response['bills'] = serialize_bills(bills, fields, include)
+        return jsonify(response), 200
 
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+# ------------------- WRITE HELPERS -------------------
+def merchant_trade_totals(items):
+    """Sum item amounts per merchant: {merchant_id: amount}."""
+    totals = defaultdict(float)
+    for item in items:
+        if item['merchant_id']:
+            totals[item['merchant_id']] += item['amount']
+    return totals
+
+def insert_bill_items(bill, user_id, items, merchants):
+    """Insert a bill's items and the adhatiya rows of its merchant items, one executemany each."""
+    if not items:
+        return
+    db.session.execute(insert(BillItem), [
+        {'bill_id': bill.id, 'business_date': bill.business_date, **item} for item in items
+    ])
+    insert_adhatiya_rows(bill, user_id, items, merchants)
+
+def insert_adhatiya_rows(bill, user_id, items, merchants):
+    income_rows = [
+        {
+            'user_id': user_id,
+            'bill_id': bill.id,
+            'merchant_id': item['merchant_id'],
+            'trade_amount': item['amount'],
+            'commission_rate': 2.0,
+            'commission_amount': calculate_adhatiya(item['amount']),
+            'date': bill.business_date
+        }
+        for item in items if item['merchant_id'] in merchants
+    ]
+    add_income_rows(user_id, income_rows)
+
+def post_merchant_deltas(merchants, deltas, bill_id):
+    """Post one ledger entry per merchant whose balance changed, in id order. Returns the entries."""
+    entries = []
+    for merchant_id in sorted(deltas):
+        merchant = merchants.get(merchant_id)
+        delta = round(deltas[merchant_id], 2)
+        if merchant and delta:
+            entry_type = 'trade' if delta > 0 else 'trade_reversal'
+            entries.append(post_entry(merchant, entry_type, debit=delta, bill_id=bill_id))
+    return entries
+
 # ------------------- CREATE BILL -------------------
 @bills_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -49,13 +184,21 @@ def create_bill():
         user_id = get_jwt_identity()
         data = request.get_json()
 
+        try:
+            items = normalize_items(data.get('items', []))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
         bill_number = generate_bill_number()
-        items_data = data.get('items', [])
         himmali = float(data.get('himmali', 0))        
         bharai = float(data.get('bharai', 0))        
         motor_bhada = float(data.get('motor_bhada', 0))
         other_charges = float(data.get('other_charges', 0))
-        totals = calculate_bill_totals(items_data, himmali,bharai, motor_bhada, other_charges)
+        totals = calculate_bill_totals(items, himmali,bharai, motor_bhada, other_charges)
+
+        # Lock all merchants on the bill once, in id order, before writing anything
+        deltas = merchant_trade_totals(items)
+        merchants = lock_merchants(deltas.keys(), user_id)
 
         bill = Bill(
             user_id=user_id,
@@ -77,39 +220,125 @@ def create_bill():
         db.session.add(bill)
         db.session.flush()  # Get bill.id before commit
 
-        for item_data in items_data:
-            item = BillItem(
-                bill_id=bill.id,
-                vegetable=item_data.get('vegetable'),
-                bags=int(item_data.get('bags')),
-                weight=float(item_data.get('weight')),
-                rate=float(item_data.get('rate')),
-                amount=float(item_data.get('amount')),
-                merchant_id=item_data.get('merchant_id')
-            )
-            db.session.add(item)
-
-            # Update merchant balance & Adhatiya
-            if item.merchant_id:
-                merchant = db.session.query(Merchant).with_for_update().filter_by(id=item.merchant_id, user_id=user_id).first()
-                if merchant:
-                    merchant.current_balance += item.amount
-
-                    commission_amount = calculate_adhatiya(item.amount)
-                    adhatiya = AdhatiyaIncome(
-                        user_id=user_id,
-                        bill_id=bill.id,
-                        merchant_id=item.merchant_id,
-                        trade_amount=item.amount,
-                        commission_rate=2.0,
-                        commission_amount=commission_amount,
-                        date=datetime.utcnow().date()
-                    )
-                    db.session.add(adhatiya)
+        insert_bill_items(bill, user_id, items, merchants)
+        post_merchant_deltas(merchants, deltas, bill.id)
 
+        bump_versions(user_id, 'bills', 'ledger')
         db.session.commit()
-        return jsonify(bill.to_dict()), 201
+        return jsonify(serialize_bill(bill)), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+# ------------------- BULK IMPORT -------------------
+BULK_IMPORT_MAX_BILLS = 5000
+BULK_IMPORT_MAX_BYTES = 10 * 1024 * 1024
 
+@bills_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_bills():
+    """Import many bills (JSON Lines or CSV) in one transaction.
+
+    Valid rows are inserted with batched INSERTs, each bill posts the same
+    rounded per-merchant ledger entries create_bill does, and invalid rows
+    are reported back by row number without blocking the rest.
+    """
+    try:
+        user_id = get_jwt_identity()
+        fmt = request.args.get('format') or ('csv' if 'csv' in (request.content_type or '') else 'jsonl')
+        if fmt not in ('csv', 'jsonl'):
+            return jsonify({'message': 'format must be csv or jsonl'}), 400
+        parser = parse_csv if fmt == 'csv' else parse_jsonl
+
+        # Rows are parsed as the body streams in; an oversized body (413 from
+        # max_content_length) or one row past the limit stops the read there
+        request.max_content_length = BULK_IMPORT_MAX_BYTES
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace', newline='')
+
+        errors = []
+        accepted = []
+        for row, data, error in parser(lines):
+            if len(accepted) + len(errors) >= BULK_IMPORT_MAX_BILLS:
+                return jsonify({'message': f'At most {BULK_IMPORT_MAX_BILLS} bills per import'}), 413
+            if error:
+                errors.append({'row': row, 'message': error})
+                continue
+            try:
+                bill, items = normalize_bill(data)
+            except ValueError as e:
+                errors.append({'row': row, 'message': str(e)})
+                continue
+            accepted.append((row, bill, items))
+
+        # Lock every merchant the import touches once, in id order; bill-level
+        # merchants are not posted to but must belong to the user as well
+        merchants = lock_merchants(
+            [item['merchant_id'] for _, _, items in accepted for item in items] +
+            [bill['merchant_id'] for _, bill, _ in accepted], user_id
+        )
+
+        valid = []
+        for row, bill, items in accepted:
+            unknown = sorted({
+                merchant_id for merchant_id in [bill['merchant_id']] + [item['merchant_id'] for item in items]
+                if merchant_id and merchant_id not in merchants
+            })
+            if unknown:
+                errors.append({'row': row, 'message': f"Unknown merchant_id: {', '.join(map(str, unknown))}"})
+                continue
+            valid.append((row, bill, items))
+
+        imported = []
+        if valid:
+            bill_numbers = generate_bill_numbers(len(valid))
+            today = business_date()
+            db.session.execute(insert(Bill), [
+                {'user_id': user_id, 'bill_number': bill_number, 'business_date': today, **bill}
+                for bill_number, (_, bill, _) in zip(bill_numbers, valid)
+            ])
+            # bill_number is unique, so one lookup maps the new rows back to their ids
+            ids_by_number = dict(
+                db.session.query(Bill.bill_number, Bill.id).filter(Bill.bill_number.in_(bill_numbers)).all()
+            )
+            bill_ids = [ids_by_number[bill_number] for bill_number in bill_numbers]
+
+            item_rows = []
+            income_rows = []
+            for bill_id, bill_number, (row, _, items) in zip(bill_ids, bill_numbers, valid):
+                imported.append({'row': row, 'id': bill_id, 'bill_number': bill_number})
+                for item in items:
+                    item_rows.append({'bill_id': bill_id, 'business_date': today, **item})
+                    if item['merchant_id']:
+                        income_rows.append({
+                            'user_id': user_id,
+                            'bill_id': bill_id,
+                            'merchant_id': item['merchant_id'],
+                            'trade_amount': item['amount'],
+                            'commission_rate': 2.0,
+                            'commission_amount': calculate_adhatiya(item['amount']),
+                            'date': today
+                        })
+
+            if item_rows:
+                db.session.execute(insert(BillItem), item_rows)
+            add_income_rows(user_id, income_rows)
+            for bill_id, (_, _, items) in zip(bill_ids, valid):
+                post_merchant_deltas(merchants, merchant_trade_totals(items), bill_id)
+
+        if imported:
+            bump_versions(user_id, 'bills', 'ledger')
+        db.session.commit()
+        errors.sort(key=lambda error: error['row'])
+        return jsonify({
+            'imported': len(imported),
+            'bills': imported,
+            'errors': errors
+        }), 201 if imported else 400
+
+    except RequestEntityTooLarge:
+        db.session.rollback()
+        return jsonify({'message': f'Imports are limited to {BULK_IMPORT_MAX_BYTES // (1024 * 1024)} MB'}), 413
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
@@ -117,20 +346,32 @@ def create_bill():
 # ------------------- GET SINGLE BILL -------------------
 @bills_bp.route('/<int:bill_id>', methods=['GET'])
 @jwt_required()
+@versioned(*BILL_ENTITIES)
 def get_bill(bill_id):
     try:
         user_id = get_jwt_identity()
         bill = Bill.query.filter_by(id=bill_id, user_id=user_id).first()
         if not bill:
             return jsonify({'message': 'Bill not found'}), 404
-        return jsonify(bill.to_dict()), 200
+        return jsonify(serialize_bill(bill)), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 # ------------------- UPDATE BILL -------------------
+ITEM_COLUMNS = ('vegetable', 'bags', 'weight', 'rate', 'amount', 'merchant_id')
+
+def item_id(raw):
+    """The id an edited item refers to, as an int (forms send "12"), or None for a new item."""
+    try:
+        return int(raw.get('id'))
+    except (TypeError, ValueError):
+        return None
+
 @bills_bp.route('/<int:bill_id>', methods=['PUT'])
 @jwt_required()
 def update_bill(bill_id):
+    """Apply an edit as a diff: items are matched by id, and only rows and
+    merchant balances that actually changed are written."""
     try:
         user_id = get_jwt_identity()
         bill = Bill.query.filter_by(id=bill_id, user_id=user_id).first()
@@ -138,71 +379,101 @@ def update_bill(bill_id):
             return jsonify({'message': 'Bill not found'}), 404
 
         data = request.get_json()
+        stored = {item.id: item for item in BillItem.query.filter_by(bill_id=bill_id).all()}
 
-        # Revert old balances & delete items/adhatiya
-        old_items = BillItem.query.filter_by(bill_id=bill_id).all()
-        for item in old_items:
-            if item.merchant_id:
-                merchant = db.session.query(Merchant).with_for_update().filter_by(id=item.merchant_id, user_id=user_id).first()
-                if merchant:
-                    merchant.current_balance -= item.amount
-            db.session.delete(item)
-        AdhatiyaIncome.query.filter_by(bill_id=bill_id, user_id=user_id).delete()
-
-        # Update bill
+        # Bill fields
         bill.farmer_name = data.get('farmer_name', bill.farmer_name)
         bill.farmer_mobile = data.get('farmer_mobile', bill.farmer_mobile)
         bill.village_name = data.get('village_name', bill.village_name)
         bill.merchant_id = data.get('merchant_id', bill.merchant_id)
+        bill.himmali = float(data.get('himmali', bill.himmali or 0))
+        bill.bharai = float(data.get('bharai', bill.bharai or 0))
+        bill.motor_bhada = float(data.get('motor_bhada', bill.motor_bhada or 0))
+        bill.other_charges = float(data.get('other_charges', bill.other_charges or 0))
+        # Checked before the queries below autoflush the changes away
+        changed = db.session.is_modified(bill)
+        posted = []
+
+        if 'items' in data:
+            raw_items = data.get('items') or []
+            try:
+                items = normalize_items(raw_items)
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+
+            deltas = defaultdict(float)
+            affected = set()  # merchants whose item amounts changed on this bill
+            added = []
+            kept = set()
+            items_changed = False
+
+            for raw, item in zip(raw_items, items):
+                existing = stored.get(item_id(raw))
+                if existing is None or existing.id in kept:
+                    added.append(item)
+                    deltas[item['merchant_id']] += item['amount']
+                    affected.add(item['merchant_id'])
+                    continue
+                kept.add(existing.id)
+                if existing.merchant_id != item['merchant_id'] or existing.amount != item['amount']:
+                    deltas[existing.merchant_id] -= existing.amount
+                    deltas[item['merchant_id']] += item['amount']
+                    affected.update((existing.merchant_id, item['merchant_id']))
+                for column in ITEM_COLUMNS:
+                    if getattr(existing, column) != item[column]:
+                        setattr(existing, column, item[column])
+                        items_changed = True
+
+            removed = [item for item_id, item in stored.items() if item_id not in kept]
+            for item in removed:
+                deltas[item.merchant_id] -= item.amount
+                affected.add(item.merchant_id)
+            affected.discard(None)
+            deltas.pop(None, None)
+
+            merchants = lock_merchants(affected, user_id)
+
+            if removed:
+                BillItem.query.filter(BillItem.id.in_([item.id for item in removed])) \
+                    .delete(synchronize_session=False)
+            if added:
+                db.session.execute(insert(BillItem), [
+                    {'bill_id': bill.id, 'business_date': bill.business_date, **item} for item in added
+                ])
+
+            # Adhatiya rows have no item link, so rewrite them per affected merchant only
+            if affected:
+                delete_income_rows(
+                    user_id,
+                    AdhatiyaIncome.bill_id == bill_id,
+                    AdhatiyaIncome.merchant_id.in_(affected)
+                )
+                insert_adhatiya_rows(bill, user_id, [
+                    item for item in items if item['merchant_id'] in affected
+                ], merchants)
+
+            posted = post_merchant_deltas(merchants, deltas, bill.id)
+            final_items = items
+            if removed or added or items_changed:
+                bill.updated_at = datetime.utcnow()
+                changed = True
+        else:
+            final_items = [{column: getattr(item, column) for column in ITEM_COLUMNS} for item in stored.values()]
 
-        items_data = data.get('items', [])
-        himmali = float(data.get('himmali', 0))
-        bharai = float(data.get('bharai', 0))
-        motor_bhada = float(data.get('motor_bhada', 0))
-        other_charges = float(data.get('other_charges', 0))
-        totals = calculate_bill_totals(items_data, himmali,bharai, motor_bhada, other_charges)
-
+        totals = calculate_bill_totals(final_items, bill.himmali, bill.bharai, bill.motor_bhada, bill.other_charges)
         bill.total_bags = totals['total_bags']
         bill.total_weight = totals['total_weight']
-        bill.himmali = himmali
-        bill.bharai = bharai
-        bill.motor_bhada = motor_bhada
-        bill.other_charges = other_charges
         bill.subtotal = totals['subtotal']
         bill.grand_total = totals['grand_total']
 
-        # Add updated items
-        for item_data in items_data:
-            item = BillItem(
-                bill_id=bill.id,
-                vegetable=item_data.get('vegetable'),
-                bags=int(item_data.get('bags')),
-                weight=float(item_data.get('weight')),
-                rate=float(item_data.get('rate')),
-                amount=float(item_data.get('amount')),
-                merchant_id=item_data.get('merchant_id')
-            )
-            db.session.add(item)
-
-            if item.merchant_id:
-                merchant = db.session.query(Merchant).with_for_update().filter_by(id=item.merchant_id, user_id=user_id).first()
-                if merchant:
-                    merchant.current_balance += item.amount
-
-                    commission_amount = calculate_adhatiya(item.amount)
-                    adhatiya = AdhatiyaIncome(
-                        user_id=user_id,
-                        bill_id=bill.id,
-                        merchant_id=item.merchant_id,
-                        trade_amount=item.amount,
-                        commission_rate=2.0,
-                        commission_amount=commission_amount,
-                        date=datetime.utcnow().date()
-                    )
-                    db.session.add(adhatiya)
-
+        # Only what changed is bumped: a no-op save keeps every ETag, and balances
+        # only move when an entry was posted (an edit that nets to zero leaves the ledger as it was)
+        entities = ['bills'] if changed or db.session.is_modified(bill) else []
+        if posted:
+            entities.append('ledger')
+        bump_versions(user_id, *entities)
         db.session.commit()
-        return jsonify({'message': 'Bill updated successfully', 'bill': bill.to_dict()}), 200
+        return jsonify({'message': 'Bill updated successfully', 'bill': serialize_bill(bill)}), 200
 
     except Exception as e:
         db.session.rollback()
@@ -218,15 +489,17 @@ def delete_bill(bill_id):
         if not bill:
             return jsonify({'message': 'Bill not found'}), 404
 
-        items = BillItem.query.filter_by(bill_id=bill_id).all()
-        for item in items:
-            if item.merchant_id:
-                merchant = db.session.query(Merchant).with_for_update().filter_by(id=item.merchant_id, user_id=user_id).first()
-                if merchant:
-                    merchant.current_balance -= item.amount
+        old_totals = db.session.query(BillItem.merchant_id, func.sum(BillItem.amount)) \
+            .filter(BillItem.bill_id == bill_id, BillItem.merchant_id.isnot(None)) \
+            .group_by(BillItem.merchant_id).all()
+        deltas = {merchant_id: -amount for merchant_id, amount in old_totals}
+        merchants = lock_merchants(deltas.keys(), user_id)
+        post_merchant_deltas(merchants, deltas, bill_id)
 
-        AdhatiyaIncome.query.filter_by(bill_id=bill_id, user_id=user_id).delete()
+        delete_income_rows(user_id, AdhatiyaIncome.bill_id == bill_id)
+        BillItem.query.filter_by(bill_id=bill_id).delete(synchronize_session=False)
         db.session.delete(bill)
+        bump_versions(user_id, 'bills', 'ledger')
         db.session.commit()
         return jsonify({'message': 'Bill deleted successfully'}), 200
 
@@ -269,65 +542,110 @@ def delete_bill(bill_id):
 #         return f"Error: {str(e)}", 500
 
 
-# Make sure User is imported from your models
-# from app.models import User, Bill, BillItem, Merchant 
-from num2words import num2words # <-- You will need this for the next step
+PRINT_CACHE_VERSION = 1  # bump when print_bill.html or utils/escpos.py output changes, so browsers drop old ETags
+PRINT_FORMATS = {
+    'html': 'text/html',
+    'escpos': 'application/octet-stream'  # raw bytes for 80 mm thermal printers
+}
+
+def print_etag(bill, user, print_format='html'):
+    """Version of a bill's printout: changes whenever the bill or the letterhead profile is edited."""
+    key = f'{PRINT_CACHE_VERSION}:{print_format}:{bill.id}:{bill.updated_at.isoformat()}:{user.updated_at.isoformat()}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
 
 @bills_bp.route('/print/<int:bill_id>', methods=['GET'])
 @jwt_required()
 def print_bill(bill_id):
     try:
         user_id = get_jwt_identity()
-        
-        # --- FIX 1: Fetch the user ---
-        user = User.query.get(user_id)
-        if not user:
-            return "User not found", 404
+        print_format = request.args.get('format', 'html')
+        if print_format not in PRINT_FORMATS:
+            return jsonify({'message': f"format must be one of {', '.join(PRINT_FORMATS)}"}), 400
 
-        bill = Bill.query.filter_by(id=bill_id, user_id=user_id).first()
-        if not bill:
+        row = db.session.query(Bill, User).join(User, User.id == Bill.user_id) \
+            .filter(Bill.id == bill_id, Bill.user_id == user_id).first()
+        if not row:
             return "Bill not found", 404
+        bill, user = row
+
+        etag = print_etag(bill, user, print_format)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            cache = current_app.extensions['print_cache']
+            body = cache.get(etag)
+            if body is None:
+                items = BillItem.query.filter_by(bill_id=bill.id).order_by(BillItem.id).all()
+                if print_format == 'escpos':
+                    body = render_escpos(bill_page_context(user, bill, items), current_app.config['ESCPOS_COLUMNS'])
+                else:
+                    body = render_template(
+                        'print_bill.html',
+                        user=user,
+                        bill=bill,
+                        items=items,
+                        amount_in_words=amount_in_words(bill.grand_total)
+                    )
+                cache.set(etag, body)
+            response = make_response(body, 200, {"Content-Type": PRINT_FORMATS[print_format]})
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except Exception as e:
+        import traceback
+        print("Error in print_bill:", e)
+        traceback.print_exc()
+        return f"Error: {str(e)}", 500
 
-        # Fetch all bill items
-        items = BillItem.query.filter_by(bill_id=bill.id).all()
+# ------------------- BATCH PRINT -------------------
+MAX_BATCH_PRINT = 2000
 
-        # Create safe merchants dict
-        merchants = {}
-        for item in items:
-            if item.merchant_id:
-                merchant = Merchant.query.filter_by(id=item.merchant_id, user_id=user_id).first()
-                if merchant:
-                    merchants[item.merchant_id] = merchant
+@bills_bp.route('/print', methods=['GET'])
+@jwt_required()
+def print_bills():
+    """All bills of a trading day (?date=, default today) or a list (?ids=1,2,3) as one HTML document."""
+    try:
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        if not user:
+            return "User not found", 404
 
-        # --- FIX 2: Generate amount_in_words (This will be your next error) ---
-        amount_in_words = "Zero"
-        if bill.grand_total and bill.grand_total > 0:
+        query = Bill.query.filter(Bill.user_id == user_id)
+        ids = request.args.get('ids')
+        if ids:
             try:
-                # Convert the total to an integer to ignore decimals
-                total_integer = int(bill.grand_total)
-                
-                # Convert only the integer part to words
-                # We use lang='en_IN' to get "Lakh" and "Crore" if needed
-                amount_in_words = num2words(total_integer, lang='en_IN').title()
-
-            except Exception as e:
-                print(f"Error converting number to words: {e}")
-                amount_in_words = "Error" # Or just a blank string
+                bill_ids = [int(value) for value in ids.split(',') if value.strip()]
+            except ValueError:
+                return jsonify({'message': 'ids must be a comma-separated list of bill ids'}), 400
+            query = query.filter(Bill.id.in_(bill_ids))
+            title = f'{len(bill_ids)} bills'
         else:
-            amount_in_words = "Zero"
-            
-        return render_template(
-            'print_bill.html',
-            # --- FIX 3: Pass user and amount_in_words to the template ---
-            user=user,
-            bill=bill,
-            items=items,
-            merchants=merchants,
-            amount_in_words=amount_in_words
-        ), 200, {"Content-Type": "text/html"}
+            date_str = request.args.get('date')
+            day = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else business_date()
+            query = query.filter(Bill.business_date == day)
+            title = day.strftime('%d-%m-%Y')
+
+        bills = query.order_by(Bill.id).limit(MAX_BATCH_PRINT + 1).all()
+        if len(bills) > MAX_BATCH_PRINT:
+            return jsonify({'message': f'At most {MAX_BATCH_PRINT} bills can be printed at once'}), 400
+        if not bills:
+            return "No bills to print", 404
+
+        items_by_bill = load_bill_items(bill.id for bill in bills)
+        contexts = [bill_page_context(user, bill, items_by_bill.get(bill.id, [])) for bill in bills]
+        # Everything is in plain dicts now; hand the connection back before the long render
+        db.session.close()
+
+        pages = render_bill_pages(contexts, current_app.config['PRINT_WORKERS'])
+        return current_app.response_class(
+            stream_template('print_bills.html', title=title, pages=pages),
+            mimetype='text/html'
+        )
 
     except Exception as e:
         import traceback
-        print("Error in print_bill:", e)
+        print("Error in print_bills:", e)
         traceback.print_exc()
-        return f"Error: {str(e)}", 500
\ No newline at end of file
+        return f"Error: {str(e)}", 500
@@ -0,0 +1,43 @@
+import click
+from flask.cli import with_appcontext
+from .models.models import db, User
+from .utils.ledger import source_totals_query, reconcile_merchant
+from .utils.income import rebuild_income_rollups
+from .utils.versions import bump_versions
+
+@click.command('rebuild-ledger')
+@click.option('--user-id', type=int, default=None, help='Only reconcile merchants of this user.')
+@with_appcontext
+def rebuild_ledger_command(user_id):
+    """Bring merchant ledgers in line with bill items and credit transactions.
+
+    Posts one adjustment entry per merchant whose cached totals differ from
+    the source rows. Run it once after applying migrations/0001 and while
+    the counters are idle.
+    """
+    adjusted = 0
+    users = set()
+    for merchant, total_trade, total_credit in source_totals_query(user_id).all():
+        if reconcile_merchant(merchant, total_trade, total_credit):
+            adjusted += 1
+            users.add(merchant.user_id)
+    for uid in sorted(users):
+        bump_versions(uid, 'ledger')
+    db.session.commit()
+    click.echo(f'Adjusted {adjusted} merchant ledger(s)')
+
+@click.command('rebuild-income')
+@click.option('--user-id', type=int, default=None, help='Only rebuild the rollups of this user.')
+@with_appcontext
+def rebuild_income_command(user_id):
+    """Recompute the day/month/season income rollups from adhatiya_income.
+
+    Run it once after applying migrations/0004, and again whenever
+    MANDI_SEASON_START_MONTHS changes.
+    """
+    user_ids = [user_id] if user_id is not None else [uid for (uid,) in db.session.query(User.id).order_by(User.id)]
+    for uid in user_ids:
+        rebuild_income_rollups(uid)
+        bump_versions(uid, 'bills')
+        db.session.commit()
+    click.echo(f'Rebuilt income rollups for {len(user_ids)} user(s)')
@@ -1,64 +1,100 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.models import db, Bill
-from sqlalchemy import func
+from ..models.models import db, Bill, BillItem
+from ..utils.helpers import business_date, encode_cursor, decode_cursor, parse_limit
+from ..utils.versions import versioned
+from sqlalchemy import func, select
 from datetime import datetime
 from . import farmers_bp
 
+def day_summary_query(user_id, filter_date):
+    """The day's farmer, bag, weight and amount totals as one aggregate row."""
+    return select(
+        func.count().label('day_farmers'),
+        func.coalesce(func.sum(Bill.total_bags), 0).label('day_bags'),
+        func.coalesce(func.sum(Bill.total_weight), 0).label('day_weight'),
+        func.coalesce(func.sum(Bill.grand_total), 0).label('day_amount')
+    ).where(Bill.user_id == user_id, Bill.business_date == filter_date)
+
 @farmers_bp.route('/', methods=['GET'])
 @jwt_required()
+@versioned('bills')
 def get_farmers():
     try:
         user_id = get_jwt_identity()
         date_str = request.args.get('date')
+        cursor = request.args.get('cursor')
+
+        try:
+            # A busy day is a few hundred farmers, so the default page holds it in one round-trip
+            limit = parse_limit(request.args.get('limit'), default=1000, maximum=1000)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
         
-        if date_str:
-            filter_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            bills = Bill.query.filter(
-                Bill.user_id == user_id,
-                func.date(Bill.created_at) == filter_date
-            ).all()
-        else:
-            bills = Bill.query.filter(
-                Bill.user_id == user_id,
-                func.date(Bill.created_at) == datetime.utcnow().date()
-            ).all()
-        
-        farmers_data = []
-        total_farmers = len(bills)
-        total_bags = 0
-        total_weight = 0
-        total_amount = 0
-        
-        for bill in bills:
-            vegetables = [item.vegetable for item in bill.items]
-            vegetables_str = ', '.join(vegetables)
-            
-            farmers_data.append({
-                'id': bill.id,
-                'bill_number': bill.bill_number,
-                'farmer_name': bill.farmer_name,
-                'farmer_mobile': bill.farmer_mobile,
-                'village_name': bill.village_name,
-                'vegetables': vegetables_str,
-                'total_bags': bill.total_bags,
-                'total_weight': bill.total_weight,
-                'grand_total': bill.grand_total,
-                'created_at': bill.created_at.isoformat() if bill.created_at else None
-            })
-            
-            total_bags += bill.total_bags
-            total_weight += bill.total_weight
-            total_amount += bill.grand_total
+        filter_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else business_date()
+
+        # Window aggregates run over the whole day before the cursor and limit are applied,
+        # so every page carries the day's summary
+        day_bills = select(
+            Bill.id, Bill.bill_number, Bill.farmer_name, Bill.farmer_mobile, Bill.village_name,
+            Bill.total_bags, Bill.total_weight, Bill.grand_total, Bill.created_at,
+            func.count().over().label('day_farmers'),
+            func.sum(Bill.total_bags).over().label('day_bags'),
+            func.sum(Bill.total_weight).over().label('day_weight'),
+            func.sum(Bill.grand_total).over().label('day_amount')
+        ).where(
+            Bill.user_id == user_id,
+            Bill.business_date == filter_date
+        ).subquery('day_bills')
+
+        # string_agg on Postgres, group_concat on SQLite; only evaluated for the rows on this page
+        vegetables = select(func.aggregate_strings(BillItem.vegetable, ', ')) \
+            .where(BillItem.bill_id == day_bills.c.id) \
+            .scalar_subquery()
+
+        query = select(day_bills, vegetables.label('vegetables'))
+        if cursor:
+            try:
+                (cursor_id,) = decode_cursor(cursor)
+                cursor_id = int(cursor_id)
+            except (TypeError, ValueError):
+                return jsonify({'message': 'Invalid cursor'}), 400
+            query = query.where(day_bills.c.id > cursor_id)
+
+        rows = db.session.execute(query.order_by(day_bills.c.id).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        farmers_data = [
+            {
+                'id': row.id,
+                'bill_number': row.bill_number,
+                'farmer_name': row.farmer_name,
+                'farmer_mobile': row.farmer_mobile,
+                'village_name': row.village_name,
+                'vegetables': row.vegetables or '',
+                'total_bags': row.total_bags,
+                'total_weight': row.total_weight,
+                'grand_total': row.grand_total,
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            }
+            for row in rows
+        ]
+        # The window totals ride along on the page's rows; a page past the last
+        # row (or an empty day) has none, so aggregate the day separately
+        totals = rows[0] if rows else db.session.execute(day_summary_query(user_id, filter_date)).one()
         
         return jsonify({
+            'date': filter_date.isoformat(),
             'farmers': farmers_data,
             'summary': {
-                'total_farmers': total_farmers,
-                'total_bags': total_bags,
-                'total_weight': total_weight,
-                'total_amount': total_amount
-            }
+                'total_farmers': totals.day_farmers,
+                'total_bags': totals.day_bags,
+                'total_weight': totals.day_weight,
+                'total_amount': totals.day_amount
+            },
+            'next_cursor': encode_cursor(rows[-1].id) if has_more else None,
+            'limit': limit
         }), 200
         
     except Exception as e:
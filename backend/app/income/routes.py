@@ -1,94 +1,175 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.models import db, AdhatiyaIncome, Merchant
-from sqlalchemy import func
+from ..models.models import db, AdhatiyaIncome, IncomeRollup, Merchant
+from ..utils.responses import stream_json
+from ..utils.income import PERIODS, period_start
+from ..utils.versions import versioned
+from ..utils.helpers import parse_fieldset
+from ..utils.serializers import fields_dict
+from ..utils.columnar import requested_format, columnar_fields, columns, merchant_table, columnar_response
+from sqlalchemy import func, select
+from sqlalchemy.orm import load_only
 from datetime import datetime
 from . import income_bp
 
+def rollup_query(user_id, period, start_date=None, end_date=None, *columns):
+    """Select of rollup rows of one period type whose period overlaps [start_date, end_date]."""
+    query = select(*columns).where(
+        IncomeRollup.user_id == user_id,
+        IncomeRollup.period == period
+    )
+    if start_date:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        query = query.where(IncomeRollup.period_start >= period_start(period, start))
+    if end_date:
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        query = query.where(IncomeRollup.period_start <= end)
+    return query
+
+def total_income_query(user_id, start_date=None, end_date=None):
+    return rollup_query(
+        user_id, 'day', start_date, end_date,
+        func.coalesce(func.sum(IncomeRollup.commission_amount), 0)
+    )
+
+def income_list_query(user_id, start_date=None, end_date=None, *columns):
+    """Income rows in [start_date, end_date], newest first: the given columns, or AdhatiyaIncome objects."""
+    query = select(*columns) if columns else select(AdhatiyaIncome)
+    query = query.where(AdhatiyaIncome.user_id == user_id)
+    if start_date:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        query = query.where(AdhatiyaIncome.date >= start)
+    if end_date:
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        query = query.where(AdhatiyaIncome.date <= end)
+    return query.order_by(AdhatiyaIncome.date.desc(), AdhatiyaIncome.id.desc())
+
+def income_merchants_query(user_id):
+    # Only the name columns are needed for merchant_name / the merchants table
+    return select(Merchant).where(Merchant.user_id == user_id).options(
+        load_only(Merchant.id, Merchant.name, Merchant.business_name))
+
+def income_summary_query(user_id, period, start_date=None, end_date=None):
+    # Month and season rows cover whole periods, so the range is widened to the periods it touches
+    return rollup_query(
+        user_id, period, start_date, end_date,
+        IncomeRollup.period_start,
+        IncomeRollup.merchant_id,
+        Merchant.name.label('merchant_name'),
+        IncomeRollup.trade_amount,
+        IncomeRollup.commission_amount
+    ).join(Merchant, Merchant.id == IncomeRollup.merchant_id) \
+     .order_by(IncomeRollup.period_start.desc(), IncomeRollup.merchant_id)
+
+def income_summary_payload(results, period):
+    summary_data = []
+    grand_total_income = 0
+
+    for result in results:
+        summary_data.append({
+            'date': result.period_start.isoformat(),
+            'period': period,
+            'merchant_id': result.merchant_id,
+            'merchant_name': result.merchant_name,
+            'total_trade': float(result.trade_amount),
+            'commission': float(result.commission_amount)
+        })
+        grand_total_income += float(result.commission_amount)
+
+    return {
+        'summary': summary_data,
+        'grand_total_income': grand_total_income
+    }
+
+INCOME_COLUMNS = ('id', 'bill_id', 'merchant_id', 'trade_amount', 'commission_rate', 'commission_amount', 'date')
+# Names accepted by ?fields= / ?include= on the income list; 'merchant' adds merchant_name
+INCOME_FIELDS = ('id', 'user_id', 'bill_id', 'merchant_id', 'trade_amount', 'commission_rate',
+                 'commission_amount', 'date', 'created_at')
+INCOME_INCLUDES = ('merchant',)
+INCOME_ENTITIES = ('bills', 'merchants')
+
+def streamed(query, scalars=False):
+    """Rows of query in batches, executed on first iteration, i.e. inside stream_json's streaming context."""
+    query = query.execution_options(yield_per=1000)
+    yield from db.session.scalars(query) if scalars else db.session.execute(query)
+
+def income_selection(fields, with_merchant):
+    """Columns to select for a fieldset: the fields, plus merchant_id when merchant names are added."""
+    selected = fields + ('merchant_id',) if with_merchant and 'merchant_id' not in fields else fields
+    return [getattr(AdhatiyaIncome, name) for name in selected]
+
+def income_columnar_payload(rows, fields, merchants, total_income):
+    """Columnar income body; merchants is None when merchant names are not included."""
+    payload = {'incomes': columns(rows, fields), 'total_income': float(total_income)}
+    if merchants is not None:
+        referenced = {row.merchant_id for row in rows}
+        payload['merchants'] = merchant_table({mid: m for mid, m in merchants.items() if mid in referenced})
+    return payload
+
+def income_fields(row, fields, merchants=None):
+    """One income row restricted to `fields`, plus merchant_name when merchants are given."""
+    data = fields_dict(row, fields)
+    if merchants is not None:
+        merchant = merchants.get(row.merchant_id)
+        data['merchant_name'] = merchant.name if merchant else None
+    return data
+
 @income_bp.route('/', methods=['GET'])
 @jwt_required()
+@versioned(*INCOME_ENTITIES)
 def get_income():
     try:
         user_id = get_jwt_identity()
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        
-        # Get all merchant IDs for the current user
-        merchant_ids = [m.id for m in Merchant.query.filter_by(user_id=user_id).all()]
-        
-        query = AdhatiyaIncome.query.filter(AdhatiyaIncome.merchant_id.in_(merchant_ids))
-        
-        if start_date:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(AdhatiyaIncome.date >= start)
-        
-        if end_date:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(AdhatiyaIncome.date <= end)
-        
-        incomes = query.order_by(AdhatiyaIncome.date.desc()).all()
-        
-        income_data = []
-        total_income = 0
-        
-        for income in incomes:
-            income_data.append(income.to_dict())
-            total_income += income.commission_amount
-        
-        return jsonify({
-            'incomes': income_data,
-            'total_income': total_income
-        }), 200
+        try:
+            fmt = requested_format()
+            fields = parse_fieldset(request.args.get('fields'), INCOME_FIELDS)
+            include = parse_fieldset(request.args.get('include'), INCOME_INCLUDES, 'include', allow_empty=True)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        total_income = db.session.execute(total_income_query(user_id, start_date, end_date)).scalar()
+
+        with_merchant = include is None or 'merchant' in include
+        merchants = None
+        if with_merchant:
+            merchants = {m.id: m for m in db.session.scalars(income_merchants_query(user_id))}
+        if fmt != 'json':
+            # Plain column tuples instead of ORM objects; merchant names go in one table
+            fields = INCOME_COLUMNS if fields is None else columnar_fields(fields)
+            rows = db.session.execute(
+                income_list_query(user_id, start_date, end_date, *income_selection(fields, with_merchant))
+            ).all()
+            return columnar_response(fmt, income_columnar_payload(rows, fields, merchants, total_income))
+
+        # A season of per-item income rows is large: stream it instead of building one big list
+        if fields is None and include is None:
+            query = income_list_query(user_id, start_date, end_date)
+            incomes = (income.to_dict(merchants) for income in streamed(query, scalars=True))
+        else:
+            fields = INCOME_FIELDS if fields is None else fields
+            query = income_list_query(user_id, start_date, end_date, *income_selection(fields, with_merchant))
+            incomes = (income_fields(row, fields, merchants) for row in streamed(query))
+        return stream_json(incomes, key='incomes', total_income=float(total_income))
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 @income_bp.route('/summary', methods=['GET'])
 @jwt_required()
+@versioned(*INCOME_ENTITIES)
 def get_income_summary():
     try:
         user_id = get_jwt_identity()
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        period = request.args.get('period', 'day')
+        if period not in PERIODS:
+            return jsonify({'message': f'period must be one of {", ".join(PERIODS)}'}), 400
         
-        # Get all merchant IDs for the current user
-        merchant_ids = [m.id for m in Merchant.query.filter_by(user_id=user_id).all()]
-        
-        query = db.session.query(
-            AdhatiyaIncome.date,
-            AdhatiyaIncome.merchant_id,
-            func.sum(AdhatiyaIncome.trade_amount).label('total_trade'),
-            func.sum(AdhatiyaIncome.commission_amount).label('total_commission')
-        ).filter(AdhatiyaIncome.merchant_id.in_(merchant_ids))
-        
-        if start_date:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(AdhatiyaIncome.date >= start)
-        
-        if end_date:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(AdhatiyaIncome.date <= end)
-        
-        results = query.group_by(AdhatiyaIncome.date, AdhatiyaIncome.merchant_id).order_by(AdhatiyaIncome.date.desc()).all()
-        
-        summary_data = []
-        grand_total_income = 0
-        
-        for result in results:
-            merchant = Merchant.query.get(result.merchant_id)
-            summary_data.append({
-                'date': result.date.isoformat() if result.date else None,
-                'merchant_id': result.merchant_id,
-                'merchant_name': merchant.name if merchant else None,
-                'total_trade': float(result.total_trade),
-                'commission': float(result.total_commission)
-            })
-            grand_total_income += float(result.total_commission)
-        
-        return jsonify({
-            'summary': summary_data,
-            'grand_total_income': grand_total_income
-        }), 200
+        results = db.session.execute(income_summary_query(user_id, period, start_date, end_date)).all()
+        return jsonify(income_summary_payload(results, period)), 200
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
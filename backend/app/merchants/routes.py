@@ -1,39 +1,75 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models.models import db, Merchant, Transaction, BillItem, Bill
-from sqlalchemy import func, desc
-from datetime import datetime
+from sqlalchemy import func, desc, union_all, literal, select, or_, and_
+from collections import defaultdict
+from datetime import datetime, timedelta
+import json
+from ..utils.ledger import lock_merchant, post_entry, entries_since_snapshot
+from ..utils.helpers import encode_cursor, decode_cursor, parse_limit, parse_fieldset, business_date, calculate_adhatiya
+from ..utils.serializers import fields_dict
+from ..utils.versions import versioned, bump_versions, current_versions
+from ..utils.columnar import requested_format, columns, columnar_response
 from . import merchants_bp
 
-# -------------------- HELPER FUNCTIONS -------------------- #
-
-def calculate_current_balance(merchant_id):
-    """Calculates current balance for a merchant dynamically."""
-    total_trade = db.session.query(func.sum(BillItem.amount)) \
-        .filter_by(merchant_id=merchant_id).scalar() or 0
-    total_credit = db.session.query(func.sum(Transaction.amount)) \
-        .filter_by(merchant_id=merchant_id, transaction_type='credit').scalar() or 0
-    return total_trade - total_credit
-
-def update_merchant_current_balance(merchant_id):
-    """Recalculate and update merchant's current balance in DB."""
-    merchant = Merchant.query.get(merchant_id)
-    if merchant:
-        merchant.current_balance = calculate_current_balance(merchant_id)
-        db.session.commit()
+# -------------------- MERCHANT DIRECTORY -------------------- #
+# id/name/business_name for dropdowns, cached per user and keyed by the
+# user's 'merchants' data version, so any merchant write invalidates it in
+# every worker process.
+
+def directory_body(user_id):
+    """The user's merchant directory as JSON text, from the cache when its version is current."""
+    version = current_versions(user_id, ('merchants',))['merchants']
+    cache = current_app.extensions['directory_cache']
+    entry = cache.get(str(user_id))
+    if entry and entry['version'] == version:
+        return entry['body']
+
+    rows = db.session.query(Merchant.id, Merchant.name, Merchant.business_name) \
+        .filter(Merchant.user_id == user_id).order_by(Merchant.name, Merchant.id).all()
+    body = json.dumps([
+        {'id': row.id, 'name': row.name, 'business_name': row.business_name} for row in rows
+    ], separators=(',', ':'))
+    cache.set(str(user_id), {'version': version, 'body': body})
+    return body
+
+@merchants_bp.route('/directory', methods=['GET'])
+@jwt_required()
+@versioned('merchants')
+def get_merchant_directory():
+    try:
+        return make_response(directory_body(get_jwt_identity()), 200, {'Content-Type': 'application/json'})
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
 
 # -------------------- MERCHANT CRUD -------------------- #
 
+# Names accepted by ?fields= on the merchant list
+MERCHANT_FIELDS = ('id', 'user_id', 'name', 'business_name', 'mobile', 'opening_balance', 'current_balance',
+                   'total_trade', 'total_credit', 'created_at', 'updated_at')
+
 @merchants_bp.route('/', methods=['GET'])
 @jwt_required()
+@versioned('merchants', 'ledger')
 def get_merchants():
     try:
         user_id = get_jwt_identity()
-        merchants = Merchant.query.filter_by(user_id=user_id).all()
+        try:
+            fields = parse_fieldset(request.args.get('fields'), MERCHANT_FIELDS)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        if fields is not None:
+            # Column select: only the requested columns are fetched, no ORM objects built
+            rows = db.session.query(*(getattr(Merchant, name) for name in fields)) \
+                .filter(Merchant.user_id == user_id).order_by(Merchant.id)
+            return jsonify([fields_dict(row, fields) for row in rows]), 200
+
+        merchants = Merchant.query.filter_by(user_id=user_id).order_by(Merchant.id).all()
         result = []
-        for m in merchants:
-            data = m.to_dict()
-            data['current_balance'] = calculate_current_balance(m.id)
+        for merchant in merchants:
+            data = merchant.to_dict()
+            data['total_trade'] = merchant.total_trade
+            data['total_credit'] = merchant.total_credit
             result.append(data)
         return jsonify(result), 200
     except Exception as e:
@@ -67,13 +103,14 @@ def create_merchant():
                 description="Opening balance credited on merchant creation"
             )
             db.session.add(opening_txn)
+            db.session.flush()
+            post_entry(merchant, 'opening', credit=opening_balance, transaction_id=opening_txn.id,
+                       description=opening_txn.description)
 
+        bump_versions(user_id, 'merchants', 'ledger')
         db.session.commit()
 
-        update_merchant_current_balance(merchant.id)
-
         merchant_dict = merchant.to_dict()
-        merchant_dict['current_balance'] = merchant.current_balance
         return jsonify({'message': 'Merchant created successfully', 'merchant': merchant_dict}), 201
 
     except Exception as e:
@@ -82,6 +119,7 @@ def create_merchant():
 
 @merchants_bp.route('/<int:merchant_id>', methods=['GET'])
 @jwt_required()
+@versioned('merchants', 'ledger', 'bills')
 def get_merchant(merchant_id):
     try:
         user_id = get_jwt_identity()
@@ -115,7 +153,7 @@ def get_merchant(merchant_id):
                 'rate': t.rate,
                 'amount': t.amount,
                 'vegetable': t.vegetable,
-                'date': t.date,
+                'date': t.date.isoformat() if t.date else None,
                 'bill_number': t.bill_number,
                 'farmer_name': t.farmer_name
             }
@@ -129,29 +167,17 @@ def get_merchant(merchant_id):
             .all()
         ]
 
-        # Calculate totals
-        total_trade = sum(item['amount'] for item in trades)
-        total_credit = sum(t['amount'] for t in transactions if t['transaction_type'] == 'credit')
-        balance = total_trade - total_credit
-
-        # Update merchant's current balance in DB
-        merchant.current_balance = balance
-        db.session.commit()
-
-        merchant_dict = merchant.to_dict()
-        merchant_dict['current_balance'] = balance
-
+        # Totals are maintained by the ledger, no need to re-sum history
         return jsonify({
-            'merchant': merchant_dict,
+            'merchant': merchant.to_dict(),
             'trades': trades,
             'transactions': transactions,
-            'total_trade': total_trade,
-            'total_credit': total_credit,
-            'balance': balance
+            'total_trade': merchant.total_trade,
+            'total_credit': merchant.total_credit,
+            'balance': merchant.current_balance
         }), 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
 @merchants_bp.route('/<int:merchant_id>', methods=['PUT'])
@@ -159,7 +185,7 @@ def get_merchant(merchant_id):
 def update_merchant(merchant_id):
     try:
         user_id = get_jwt_identity()
-        merchant = Merchant.query.filter_by(id=merchant_id, user_id=user_id).first()
+        merchant = lock_merchant(merchant_id, user_id)
         if not merchant:
             return jsonify({'message': 'Merchant not found'}), 404
 
@@ -173,6 +199,8 @@ def update_merchant(merchant_id):
             merchant.business_name = data.get('business_name')
         if data.get('mobile'):
             merchant.mobile = data.get('mobile')
+        # Checked before the opening-balance lookup below autoflushes the changes away
+        details_changed = db.session.is_modified(merchant)
 
         if new_opening != old_opening:
             merchant.opening_balance = new_opening
@@ -182,10 +210,12 @@ def update_merchant(merchant_id):
                 transaction_type='credit'
             ).first()
             if opening_txn:
+                old_amount = opening_txn.amount
                 opening_txn.amount = new_opening
                 opening_txn.description = f"Opening balance updated to {new_opening}"
                 opening_txn.user_id = user_id
             else:
+                old_amount = 0
                 opening_txn = Transaction(
                     user_id=user_id,
                     merchant_id=merchant_id,
@@ -195,11 +225,17 @@ def update_merchant(merchant_id):
                     description="Opening balance added on update"
                 )
                 db.session.add(opening_txn)
+                db.session.flush()
+            post_entry(merchant, 'opening', credit=new_opening - old_amount, transaction_id=opening_txn.id,
+                       description=opening_txn.description)
 
-        update_merchant_current_balance(merchant_id)
+        entities = ['merchants'] if details_changed else []
+        if new_opening != old_opening:
+            entities.append('ledger')
+        bump_versions(user_id, *entities)
+        db.session.commit()
 
         merchant_dict = merchant.to_dict()
-        merchant_dict['current_balance'] = merchant.current_balance
 
         return jsonify({'message': 'Merchant updated successfully', 'merchant': merchant_dict}), 200
 
@@ -216,6 +252,7 @@ def delete_merchant(merchant_id):
         if not merchant:
             return jsonify({'message': 'Merchant not found'}), 404
         db.session.delete(merchant)
+        bump_versions(user_id, 'merchants', 'ledger', 'bills')
         db.session.commit()
         return jsonify({'message': 'Merchant deleted successfully'}), 200
     except Exception as e:
@@ -229,7 +266,7 @@ def delete_merchant(merchant_id):
 def add_credit(merchant_id):
     try:
         user_id = get_jwt_identity()
-        merchant = Merchant.query.filter_by(id=merchant_id, user_id=user_id).first()
+        merchant = lock_merchant(merchant_id, user_id)
         if not merchant:
             return jsonify({'message': 'Merchant not found'}), 404
 
@@ -245,12 +282,13 @@ def add_credit(merchant_id):
             description=data.get('description', '')
         )
         db.session.add(transaction)
+        db.session.flush()
+        post_entry(merchant, 'credit', credit=amount, transaction_id=transaction.id,
+                   description=transaction.description)
+        bump_versions(user_id, 'ledger')
         db.session.commit()
 
-        update_merchant_current_balance(merchant_id)
-
         merchant_dict = merchant.to_dict()
-        merchant_dict['current_balance'] = merchant.current_balance
 
         return jsonify({'message': 'Credit added successfully', 'transaction': transaction.to_dict(), 'merchant': merchant_dict}), 201
 
@@ -263,7 +301,7 @@ def add_credit(merchant_id):
 def update_credit(merchant_id, transaction_id):
     try:
         user_id = get_jwt_identity()
-        merchant = Merchant.query.filter_by(id=merchant_id, user_id=user_id).first()
+        merchant = lock_merchant(merchant_id, user_id)
         if not merchant:
             return jsonify({'message': 'Merchant not found'}), 404
 
@@ -272,16 +310,19 @@ def update_credit(merchant_id, transaction_id):
             return jsonify({'message': 'Credit transaction not found'}), 404
 
         data = request.get_json()
+        old_amount = transaction.amount
         transaction.amount = float(data.get('amount', transaction.amount))
         transaction.payment_mode = data.get('payment_mode', transaction.payment_mode)
         transaction.description = data.get('description', transaction.description)
-        transaction.user_id = user_id
 
+        if db.session.is_modified(transaction):
+            transaction.user_id = user_id
+            post_entry(merchant, 'credit_adjustment', credit=transaction.amount - old_amount,
+                       transaction_id=transaction.id, description=transaction.description)
+            bump_versions(user_id, 'ledger')
         db.session.commit()
-        update_merchant_current_balance(merchant_id)
 
         merchant_dict = merchant.to_dict()
-        merchant_dict['current_balance'] = merchant.current_balance
 
         return jsonify({'message': 'Credit updated successfully', 'transaction': transaction.to_dict(), 'merchant': merchant_dict}), 200
 
@@ -294,7 +335,7 @@ def update_credit(merchant_id, transaction_id):
 def delete_credit(merchant_id, transaction_id):
     try:
         user_id = get_jwt_identity()
-        merchant = Merchant.query.filter_by(id=merchant_id, user_id=user_id).first()
+        merchant = lock_merchant(merchant_id, user_id)
         if not merchant:
             return jsonify({'message': 'Merchant not found'}), 404
 
@@ -302,13 +343,13 @@ def delete_credit(merchant_id, transaction_id):
         if not transaction:
             return jsonify({'message': 'Credit transaction not found'}), 404
 
+        post_entry(merchant, 'credit_reversal', credit=-transaction.amount,
+                   transaction_id=transaction.id, description=transaction.description)
         db.session.delete(transaction)
+        bump_versions(user_id, 'ledger')
         db.session.commit()
 
-        update_merchant_current_balance(merchant_id)
-
         merchant_dict = merchant.to_dict()
-        merchant_dict['current_balance'] = merchant.current_balance
 
         return jsonify({'message': 'Credit deleted successfully', 'merchant': merchant_dict}), 200
 
@@ -316,71 +357,295 @@ def delete_credit(merchant_id, transaction_id):
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
+# -------------------- LEDGER -------------------- #
+
+@merchants_bp.route('/<int:merchant_id>/ledger', methods=['GET'])
+@jwt_required()
+@versioned('merchants', 'ledger', 'bills')
+def get_merchant_ledger(merchant_id):
+    try:
+        user_id = get_jwt_identity()
+        merchant = Merchant.query.filter_by(id=merchant_id, user_id=user_id).first()
+        if not merchant:
+            return jsonify({'message': 'Merchant not found'}), 404
+
+        snapshot, entries = entries_since_snapshot(merchant_id)
+
+        return jsonify({
+            'merchant': merchant.to_dict(),
+            'snapshot': snapshot.to_dict() if snapshot else None,
+            'entries': [entry.to_dict() for entry in entries],
+            'balance': merchant.current_balance
+        }), 200
+
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+# -------------------- STATEMENT -------------------- #
+
+STATEMENT_TRADE = 0
+STATEMENT_CREDIT = 1
+STATEMENT_ENTITIES = ('merchants', 'ledger', 'bills')
+
+def statement_entries(merchant_id, user_id):
+    """Trades (bill items) and credits of a merchant as one date-ordered subquery."""
+    trades = select(
+        literal(STATEMENT_TRADE).label('kind'),
+        BillItem.id.label('entry_id'),
+        Bill.created_at.label('date'),
+        BillItem.amount.label('debit'),
+        literal(0.0).label('credit'),
+        BillItem.vegetable.label('vegetable'),
+        BillItem.bags.label('bags'),
+        BillItem.weight.label('weight'),
+        BillItem.rate.label('rate'),
+        Bill.bill_number.label('bill_number'),
+        Bill.farmer_name.label('farmer_name'),
+        literal(None, db.String).label('payment_mode'),
+        literal(None, db.String).label('description')
+    ).join(Bill, Bill.id == BillItem.bill_id) \
+     .where(BillItem.merchant_id == merchant_id, Bill.user_id == user_id)
+
+    credits = select(
+        literal(STATEMENT_CREDIT).label('kind'),
+        Transaction.id.label('entry_id'),
+        Transaction.created_at.label('date'),
+        literal(0.0).label('debit'),
+        Transaction.amount.label('credit'),
+        literal(None, db.String).label('vegetable'),
+        literal(None, db.Integer).label('bags'),
+        literal(None, db.Float).label('weight'),
+        literal(None, db.Float).label('rate'),
+        literal(None, db.String).label('bill_number'),
+        literal(None, db.String).label('farmer_name'),
+        Transaction.payment_mode.label('payment_mode'),
+        Transaction.description.label('description')
+    ).where(Transaction.merchant_id == merchant_id, Transaction.user_id == user_id,
+            Transaction.transaction_type == 'credit')
+
+    return union_all(trades, credits).subquery('statement_entries')
+
+def statement_entry(row):
+    """One statement_entries row (with running_balance) as the statement's JSON entry."""
+    return {
+        'type': 'trade' if row.kind == STATEMENT_TRADE else 'credit',
+        'id': row.entry_id,
+        'date': row.date.isoformat() if row.date else None,
+        'debit': row.debit,
+        'credit': row.credit,
+        'running_balance': row.running_balance,
+        'vegetable': row.vegetable,
+        'bags': row.bags,
+        'weight': row.weight,
+        'rate': row.rate,
+        'bill_number': row.bill_number,
+        'farmer_name': row.farmer_name,
+        'payment_mode': row.payment_mode,
+        'description': row.description
+    }
+
+STATEMENT_COLUMNS = ('kind', 'entry_id', 'date', 'debit', 'credit', 'running_balance', 'vegetable', 'bags',
+                     'weight', 'rate', 'bill_number', 'farmer_name', 'payment_mode', 'description')
+
+def decode_statement_cursor(cursor):
+    """(date, kind, entry_id, opening_balance) from a statement cursor. Raises ValueError."""
+    try:
+        cursor_date, cursor_kind, cursor_id, opening_balance = decode_cursor(cursor)
+        return datetime.fromisoformat(cursor_date), int(cursor_kind), int(cursor_id), float(opening_balance)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+def statement_after(entries, cursor_date, cursor_kind, cursor_id):
+    """Keyset condition: entries after (date, kind, entry_id)."""
+    return or_(
+        entries.c.date > cursor_date,
+        and_(entries.c.date == cursor_date, or_(
+            entries.c.kind > cursor_kind,
+            and_(entries.c.kind == cursor_kind, entries.c.entry_id > cursor_id)
+        ))
+    )
+
+def statement_until(entries, end_date):
+    """Entries on or before end_date (YYYY-MM-DD), the whole of that day included."""
+    return entries.c.date < datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+
+def statement_opening_query(entries, start):
+    """Balance of the statement's own entries dated before start.
+
+    Summed from the same bill and credit dates the rows use: ledger entries
+    are stamped when they are posted, so an edit to an older bill (or a
+    rebuilt ledger) would put its snapshot balances on a different time base.
+    """
+    return select(func.coalesce(func.sum(entries.c.debit - entries.c.credit), 0)).where(entries.c.date < start)
+
+def statement_page_query(entries, conditions, opening_balance, limit):
+    """One page (limit + 1 rows, to detect more) with its running balance."""
+    # Window runs over the filtered rows only, so the page's running balance
+    # starts from the carried-in opening balance
+    order = (entries.c.date, entries.c.kind, entries.c.entry_id)
+    running_balance = (
+        literal(opening_balance) +
+        func.sum(entries.c.debit - entries.c.credit).over(order_by=order)
+    ).label('running_balance')
+    return select(entries, running_balance).where(*conditions).order_by(*order).limit(limit + 1)
+
+def statement_payload(merchant, rows, opening_balance, limit, fmt='json'):
+    """Statement response body from a page fetched with statement_page_query."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    closing_balance = rows[-1].running_balance if rows else opening_balance
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.date, last.kind, last.entry_id, last.running_balance)
+
+    payload = {
+        'merchant': merchant.to_dict(),
+        'total_trade': merchant.total_trade,
+        'total_credit': merchant.total_credit,
+        'balance': merchant.current_balance,
+        'opening_balance': opening_balance,
+        'closing_balance': closing_balance,
+        'next_cursor': next_cursor,
+        'limit': limit
+    }
+    if fmt != 'json':
+        # The merchant is already sent once above; entries become column arrays
+        entry_columns = columns(rows, STATEMENT_COLUMNS)
+        entry_columns['type'] = ['trade' if kind == STATEMENT_TRADE else 'credit' for kind in entry_columns.pop('kind')]
+        entry_columns['id'] = entry_columns.pop('entry_id')
+        payload['entries'] = entry_columns
+    else:
+        payload['entries'] = [statement_entry(row) for row in rows]
+    return payload
+
+@merchants_bp.route('/<int:merchant_id>/statement', methods=['GET'])
+@jwt_required()
+@versioned(*STATEMENT_ENTITIES)
+def get_merchant_statement(merchant_id):
+    try:
+        user_id = get_jwt_identity()
+        merchant = Merchant.query.filter_by(id=merchant_id, user_id=user_id).first()
+        if not merchant:
+            return jsonify({'message': 'Merchant not found'}), 404
+
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        cursor = request.args.get('cursor')
+        try:
+            limit = parse_limit(request.args.get('limit'), default=100, maximum=500)
+            fmt = requested_format()
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        entries = statement_entries(merchant_id, user_id)
+        conditions = []
+        if end_date:
+            conditions.append(statement_until(entries, end_date))
+
+        # Opening balance: carried in the cursor on later pages, otherwise
+        # everything before start_date, otherwise zero
+        if cursor:
+            try:
+                cursor_date, cursor_kind, cursor_id, opening_balance = decode_statement_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            conditions.append(statement_after(entries, cursor_date, cursor_kind, cursor_id))
+        elif start_date:
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            opening_balance = float(db.session.execute(statement_opening_query(entries, start)).scalar())
+            conditions.append(entries.c.date >= start)
+        else:
+            opening_balance = 0.0
+
+        rows = db.session.execute(statement_page_query(entries, conditions, opening_balance, limit)).all()
+        payload = statement_payload(merchant, rows, opening_balance, limit, fmt)
+        if fmt != 'json':
+            return columnar_response(fmt, payload)
+        return jsonify(payload), 200
+
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
 # -------------------- SUMMARY -------------------- #
 
+# Each row embeds the merchant, current_balance included, so payments ('ledger') change it too
+SUMMARY_ENTITIES = ('bills', 'merchants', 'ledger')
+
+def summary_query(user_id, filter_date):
+    """Per-merchant totals for the day in one grouped query: (Merchant, subtotal, total_bags, total_weight)."""
+    return select(
+        Merchant,
+        func.sum(BillItem.amount).label('subtotal'),
+        func.sum(BillItem.bags).label('total_bags'),
+        func.sum(BillItem.weight).label('total_weight')
+    ).join(BillItem, BillItem.merchant_id == Merchant.id) \
+     .where(Merchant.user_id == user_id, BillItem.business_date == filter_date) \
+     .group_by(Merchant.id) \
+     .order_by(Merchant.id)
+
+def summary_items_query(filter_date, merchant_ids):
+    return select(BillItem).where(
+        BillItem.business_date == filter_date,
+        BillItem.merchant_id.in_(merchant_ids)
+    ).order_by(BillItem.id)
+
+def summary_payload(rows, items, include, filter_date):
+    """Summary response body from summary_query rows and, for include=items, the day's items."""
+    merchants = {merchant.id: merchant for merchant, *_ in rows}
+    items_by_merchant = defaultdict(list)
+    for item in items:
+        items_by_merchant[item.merchant_id].append(item.to_dict(merchants))
+
+    summary = []
+    grand_total = 0
+    total_commission = 0
+    total_bags = 0
+    total_weight = 0
+
+    for merchant, subtotal, bags, weight in rows:
+        subtotal, bags, weight = float(subtotal or 0), int(bags or 0), float(weight or 0)
+        commission = calculate_adhatiya(subtotal)
+        entry = {
+            'merchant': merchant.to_dict(),
+            'subtotal': subtotal,
+            'total_bags': bags,
+            'total_weight': weight,
+            'commission': commission
+        }
+        if 'items' in include:
+            entry['items'] = items_by_merchant[merchant.id]
+        summary.append(entry)
+        grand_total += subtotal
+        total_commission += commission
+        total_bags += bags
+        total_weight += weight
+
+    return {
+        'date': filter_date.isoformat(),
+        'summary': summary,
+        'grand_total': grand_total,
+        'total_commission': total_commission,
+        'total_bags': total_bags,
+        'total_weight': total_weight
+    }
+
 @merchants_bp.route('/summary', methods=['GET'])
 @jwt_required()
+@versioned(*SUMMARY_ENTITIES)
 def get_merchant_summary():
     try:
         user_id = get_jwt_identity()
         date_str = request.args.get('date')
-        if date_str:
-            filter_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            bill_items = BillItem.query.join(Merchant).filter(
-                Merchant.user_id==user_id,
-                func.date(BillItem.created_at)==filter_date
-            ).all()
-        else:
-            bill_items = BillItem.query.join(Merchant).filter(
-                Merchant.user_id==user_id,
-                func.date(BillItem.created_at)==datetime.utcnow().date()
-            ).all()
-
-        merchant_data = {}
-        for item in bill_items:
-            if item.merchant_id:
-                if item.merchant_id not in merchant_data:
-                    merchant_obj = Merchant.query.get(item.merchant_id)
-                    merchant_data[item.merchant_id] = {
-                        'merchant': merchant_obj.to_dict() if merchant_obj else None,
-                        'items': [],
-                        'subtotal': 0,
-                        'total_bags': 0,
-                        'total_weight': 0
-                    }
-                merchant_data[item.merchant_id]['items'].append(item.to_dict())
-                merchant_data[item.merchant_id]['subtotal'] += item.amount
-                merchant_data[item.merchant_id]['total_bags'] += item.bags
-                merchant_data[item.merchant_id]['total_weight'] += item.weight
-
-        summary = []
-        grand_total = 0
-        total_commission = 0
-        total_bags = 0
-        total_weight = 0
-
-        for merchant_id, data in merchant_data.items():
-            commission = round(data['subtotal'] * 0.02, 2)
-            summary.append({
-                'merchant': data['merchant'],
-                'items': data['items'],
-                'subtotal': data['subtotal'],
-                'total_bags': data['total_bags'],
-                'total_weight': data['total_weight'],
-                'commission': commission
-            })
-            grand_total += data['subtotal']
-            total_commission += commission
-            total_bags += data['total_bags']
-            total_weight += data['total_weight']
-
-        return jsonify({
-            'summary': summary,
-            'grand_total': grand_total,
-            'total_commission': total_commission,
-            'total_bags': total_bags,
-            'total_weight': total_weight
-        }), 200
+        filter_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else business_date()
+        include = {part.strip() for part in request.args.get('include', '').split(',') if part.strip()}
+
+        rows = db.session.execute(summary_query(user_id, filter_date)).all()
+        items = []
+        if 'items' in include and rows:
+            items = db.session.scalars(summary_items_query(filter_date, [merchant.id for merchant, *_ in rows])).all()
+        return jsonify(summary_payload(rows, items, include, filter_date)), 200
 
     except Exception as e:
         return jsonify({'message': str(e)}), 500
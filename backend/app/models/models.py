@@ -186,6 +186,7 @@
 
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from ..utils.helpers import business_date
 
 db = SQLAlchemy()
 print("Database initialized")
@@ -223,6 +224,9 @@ class User(db.Model):
 
 class Merchant(db.Model):
     __tablename__ = 'merchants'
+    __table_args__ = (
+        db.Index('ix_merchants_user_id', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # ownership
@@ -231,11 +235,17 @@ class Merchant(db.Model):
     mobile = db.Column(db.String(20), nullable=False)
     opening_balance = db.Column(db.Float, default=0.0)
     current_balance = db.Column(db.Float, default=0.0)
+    # Running totals maintained by utils/ledger.py alongside current_balance
+    total_trade = db.Column(db.Float, default=0.0, nullable=False)
+    total_credit = db.Column(db.Float, default=0.0, nullable=False)
+    ledger_sequence = db.Column(db.Integer, default=0, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     bills = db.relationship('Bill', backref='merchant', lazy=True, cascade='all, delete-orphan')
     transactions = db.relationship('Transaction', backref='merchant', lazy=True, cascade='all, delete-orphan')
+    ledger_entries = db.relationship('MerchantLedger', backref='merchant', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    balance_snapshots = db.relationship('MerchantBalanceSnapshot', backref='merchant', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
     def to_dict(self):
         return {
@@ -253,6 +263,11 @@ class Merchant(db.Model):
 
 class Bill(db.Model):
     __tablename__ = 'bills'
+    __table_args__ = (
+        db.Index('ix_bills_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_bills_merchant_id', 'merchant_id'),
+        db.Index('ix_bills_user_id_business_date', 'user_id', 'business_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # ownership
@@ -273,12 +288,21 @@ class Bill(db.Model):
     subtotal = db.Column(db.Float, default=0.0)
     grand_total = db.Column(db.Float, default=0.0)
     
+    business_date = db.Column(db.Date, nullable=False, default=lambda: business_date())  # trading day, mandi timezone
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     items = db.relationship('BillItem', backref='bill', lazy=True, cascade='all, delete-orphan')
 
-    def to_dict(self):
+    def to_dict(self, merchants=None, items=None):
+        # merchants (id -> Merchant) and items let callers pass preloaded rows
+        # instead of lazy-loading them per bill; see utils/serializers.py
+        if merchants is not None:
+            merchant = merchants.get(self.merchant_id)
+        else:
+            merchant = self.merchant
+        if items is None:
+            items = self.items
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -287,7 +311,7 @@ class Bill(db.Model):
             'farmer_mobile': self.farmer_mobile,
             'village_name': self.village_name,
             'merchant_id': self.merchant_id,
-            'merchant': self.merchant.to_dict() if self.merchant else None,
+            'merchant': merchant.to_dict() if merchant else None,
             'total_bags': self.total_bags,
             'total_weight': self.total_weight,
             'himmali': self.himmali,
@@ -296,7 +320,8 @@ class Bill(db.Model):
             'other_charges': self.other_charges,
             'subtotal': self.subtotal,
             'grand_total': self.grand_total,
-            'items': [item.to_dict() for item in self.items],
+            'items': [item.to_dict(merchants) for item in items],
+            'business_date': self.business_date.isoformat() if self.business_date else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -304,6 +329,11 @@ class Bill(db.Model):
 
 class BillItem(db.Model):
     __tablename__ = 'bill_items'
+    __table_args__ = (
+        db.Index('ix_bill_items_bill_id', 'bill_id'),
+        db.Index('ix_bill_items_merchant_id', 'merchant_id'),
+        db.Index('ix_bill_items_business_date_merchant_id', 'business_date', 'merchant_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     bill_id = db.Column(db.Integer, db.ForeignKey('bills.id'), nullable=False)
@@ -314,9 +344,14 @@ class BillItem(db.Model):
     amount = db.Column(db.Float, nullable=False)
     merchant_id = db.Column(db.Integer, db.ForeignKey('merchants.id'), nullable=True)
     
+    business_date = db.Column(db.Date, nullable=False, default=lambda: business_date())  # same as the bill's
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
+    def to_dict(self, merchants=None):
+        if merchants is not None:
+            merchant = merchants.get(self.merchant_id)
+        else:
+            merchant = Merchant.query.get(self.merchant_id) if self.merchant_id else None
         return {
             'id': self.id,
             'bill_id': self.bill_id,
@@ -326,13 +361,17 @@ class BillItem(db.Model):
             'rate': self.rate,
             'amount': self.amount,
             'merchant_id': self.merchant_id,
-            'merchant': Merchant.query.get(self.merchant_id).to_dict() if self.merchant_id else None,
+            'merchant': merchant.to_dict() if merchant else None,
+            'business_date': self.business_date.isoformat() if self.business_date else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_merchant_id_transaction_type', 'merchant_id', 'transaction_type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # ownership
@@ -358,6 +397,11 @@ class Transaction(db.Model):
 
 class AdhatiyaIncome(db.Model):
     __tablename__ = 'adhatiya_income'
+    __table_args__ = (
+        db.Index('ix_adhatiya_income_user_id_date', 'user_id', 'date'),
+        db.Index('ix_adhatiya_income_merchant_id_date', 'merchant_id', 'date'),
+        db.Index('ix_adhatiya_income_bill_id', 'bill_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # ownership
@@ -366,11 +410,14 @@ class AdhatiyaIncome(db.Model):
     trade_amount = db.Column(db.Float, nullable=False)
     commission_rate = db.Column(db.Float, default=2.0)
     commission_amount = db.Column(db.Float, nullable=False)
-    date = db.Column(db.Date, default=datetime.utcnow().date)
+    date = db.Column(db.Date, default=lambda: business_date())  # business date of the bill
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
-        merchant = Merchant.query.get(self.merchant_id)
+    def to_dict(self, merchants=None):
+        if merchants is not None:
+            merchant = merchants.get(self.merchant_id)
+        else:
+            merchant = Merchant.query.get(self.merchant_id)
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -383,3 +430,127 @@ class AdhatiyaIncome(db.Model):
             'date': self.date.isoformat() if self.date else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class MerchantLedger(db.Model):
+    """Append-only debit/credit history of a merchant's balance.
+
+    debit moves the balance up (trades), credit moves it down (payments and
+    the opening balance). Corrections are posted as new entries with negative
+    amounts, never by editing old rows. bill_id/transaction_id are plain
+    references so the history survives deletion of the source row.
+    """
+    __tablename__ = 'merchant_ledger'
+    __table_args__ = (
+        db.UniqueConstraint('merchant_id', 'sequence', name='uq_merchant_ledger_merchant_sequence'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # ownership
+    merchant_id = db.Column(db.Integer, db.ForeignKey('merchants.id', ondelete='CASCADE'), nullable=False)
+    sequence = db.Column(db.Integer, nullable=False)
+    entry_type = db.Column(db.String(30), nullable=False)
+    bill_id = db.Column(db.Integer, nullable=True)
+    transaction_id = db.Column(db.Integer, nullable=True)
+    debit = db.Column(db.Float, default=0.0, nullable=False)
+    credit = db.Column(db.Float, default=0.0, nullable=False)
+    running_balance = db.Column(db.Float, nullable=False)
+    description = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'merchant_id': self.merchant_id,
+            'sequence': self.sequence,
+            'entry_type': self.entry_type,
+            'bill_id': self.bill_id,
+            'transaction_id': self.transaction_id,
+            'debit': self.debit,
+            'credit': self.credit,
+            'running_balance': self.running_balance,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class MerchantBalanceSnapshot(db.Model):
+    __tablename__ = 'merchant_balance_snapshots'
+    __table_args__ = (
+        db.Index('ix_merchant_balance_snapshots_merchant_sequence', 'merchant_id', 'ledger_sequence'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    merchant_id = db.Column(db.Integer, db.ForeignKey('merchants.id', ondelete='CASCADE'), nullable=False)
+    ledger_sequence = db.Column(db.Integer, nullable=False)  # last ledger entry included
+    balance = db.Column(db.Float, nullable=False)
+    total_trade = db.Column(db.Float, nullable=False)
+    total_credit = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'merchant_id': self.merchant_id,
+            'ledger_sequence': self.ledger_sequence,
+            'balance': self.balance,
+            'total_trade': self.total_trade,
+            'total_credit': self.total_credit,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class IncomeRollup(db.Model):
+    """Adhatiya income totals per (user, period, period start, merchant).
+
+    period is 'day', 'month' or 'season'. Rows are kept current by
+    utils/income.py whenever adhatiya_income rows are written or removed.
+    """
+    __tablename__ = 'income_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'period', 'period_start', 'merchant_id', name='uq_income_rollups_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # ownership
+    period = db.Column(db.String(10), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    merchant_id = db.Column(db.Integer, db.ForeignKey('merchants.id', ondelete='CASCADE'), nullable=False)
+    trade_amount = db.Column(db.Float, default=0.0, nullable=False)
+    commission_amount = db.Column(db.Float, default=0.0, nullable=False)
+    entries = db.Column(db.Integer, default=0, nullable=False)
+
+
+class RefreshToken(db.Model):
+    """Server-side record of an issued refresh token.
+
+    Each refresh rotates the token: the old row is revoked and points at its
+    replacement. All tokens descending from one login share a family_id, so
+    replaying an already-rotated token revokes the whole family.
+    """
+    __tablename__ = 'refresh_tokens'
+    __table_args__ = (
+        db.Index('ix_refresh_tokens_user_id', 'user_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    family_id = db.Column(db.String(36), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+    replaced_by = db.Column(db.String(36), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DataVersion(db.Model):
+    """Per-user change counter for one kind of data (bills, merchants, ledger, profile).
+
+    Bumped in the same transaction as every write to that data; list
+    endpoints derive their ETags from it (utils/versions.py).
+    """
+    __tablename__ = 'data_versions'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    entity = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.BigInteger, default=0, nullable=False)
@@ -0,0 +1,49 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from .deps import create_engine_for, json_response
+
+# ASGI front for the backend. The read-heavy GET endpoints (bills list,
+# merchant statement and summary, income list and summary) run as coroutines
+# on SQLAlchemy's async engine, so a slow report waits on the database without
+# holding a worker thread. Every other route is passed through to the Flask
+# app when a2wsgi is installed; otherwise serve Flask separately and route
+# only these paths here.
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:  # pragma: no cover - optional
+    WSGIMiddleware = None
+
+def create_read_api(flask_app):
+    """ASGI app serving the async read endpoints, sharing flask_app's config, models and JWT settings."""
+    engine = create_engine_for(flask_app.config)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    app = FastAPI(title='Mandi read API', lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+    app.state.flask_app = flask_app
+    app.state.sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    @app.exception_handler(HTTPException)
+    async def http_error(request, exc):
+        # Same bodies as the Flask views: {'message'}, or {'msg'} for token errors as flask-jwt-extended sends
+        key = 'msg' if exc.status_code in (401, 422) else 'message'
+        return json_response({key: exc.detail}, status_code=exc.status_code)
+
+    @app.exception_handler(Exception)
+    async def server_error(request, exc):
+        return json_response({'message': str(exc)}, status_code=500)
+
+    from .routes import router
+    app.include_router(router)
+    app.add_middleware(GZipMiddleware, minimum_size=flask_app.config['COMPRESS_MIN_SIZE'],
+                       compresslevel=flask_app.config['GZIP_LEVEL'])
+
+    if WSGIMiddleware is not None:
+        app.mount('/', WSGIMiddleware(flask_app))
+    return app
@@ -0,0 +1,100 @@
+import json
+from fastapi import HTTPException, Request, Response
+from flask_jwt_extended import decode_token
+from jwt import ExpiredSignatureError, InvalidTokenError
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.http import parse_etags
+from ..models.models import DataVersion
+from ..utils.columnar import msgpack
+from ..utils.helpers import business_date
+from ..utils.responses import orjson
+from ..utils.versions import version_etag
+
+# Engine, session, auth and response plumbing for the async read API. The
+# Flask app stays the source of truth: its config picks the database and the
+# JWT settings, and every request runs inside its app context, so shared
+# helpers (business_date, season_start, token decoding) behave exactly as
+# they do in the Flask views.
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+def async_database_url(url):
+    """The async-driver form of a sync database URL: psycopg2 -> asyncpg, pysqlite -> aiosqlite."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_engine_for(config):
+    """Async engine for the Flask app's database (or ASYNC_DATABASE_URL), with the same pool settings."""
+    url = make_url(config.get('ASYNC_DATABASE_URL') or async_database_url(config['SQLALCHEMY_DATABASE_URI']))
+    options = {} if url.get_backend_name() == 'sqlite' else dict(config['SQLALCHEMY_ENGINE_OPTIONS'])
+    return create_async_engine(url, **options)
+
+# ------------------- REQUEST DEPENDENCIES -------------------
+
+async def flask_context(request: Request):
+    """Run the request inside the Flask app context (config, current_app)."""
+    with request.app.state.flask_app.app_context():
+        yield
+
+async def get_session(request: Request):
+    async with request.app.state.sessions() as session:
+        yield session
+
+async def current_user_id(request: Request):
+    """Identity of a valid access token, checked with flask-jwt-extended's own decoder and settings."""
+    config = request.app.state.flask_app.config
+    scheme, _, token = request.headers.get(config['JWT_HEADER_NAME'], '').partition(' ')
+    if scheme != config['JWT_HEADER_TYPE'] or not token:
+        raise HTTPException(401, 'Missing Authorization Header')
+    try:
+        claims = decode_token(token)
+    except ExpiredSignatureError:
+        raise HTTPException(401, 'Token has expired')
+    except InvalidTokenError as e:
+        raise HTTPException(422, str(e))
+    if claims.get('type') != 'access':
+        raise HTTPException(422, 'Only non-refresh tokens are allowed')
+    return int(claims[config['JWT_IDENTITY_CLAIM']])
+
+# ------------------- RESPONSES -------------------
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def json_response(payload, status_code=200, headers=None):
+    return Response(dumps(payload), status_code=status_code, headers=headers, media_type='application/json')
+
+def format_response(fmt, payload, headers=None):
+    """Columnar / msgpack body, as columnar_response builds it in the Flask views."""
+    payload = {'format': 'columnar', **payload}
+    if fmt == 'msgpack':
+        return Response(msgpack.packb(payload), headers=headers, media_type='application/msgpack')
+    return json_response(payload, headers=headers)
+
+async def data_etag(request, session, user_id, entities):
+    """Same ETag the Flask @versioned views give the same request."""
+    versions = {entity: 0 for entity in entities}
+    versions.update((await session.execute(
+        select(DataVersion.entity, DataVersion.version).where(
+            DataVersion.user_id == user_id,
+            DataVersion.entity.in_(entities)
+        )
+    )).all())
+    full_path = f'{request.url.path}?{request.url.query}'
+    return version_etag(user_id, full_path, business_date(), versions)
+
+def cache_headers(etag):
+    return {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+
+def not_modified(request, etag):
+    """304 when If-None-Match (weakly) matches etag, else None."""
+    if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
@@ -0,0 +1,240 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.models import Merchant, BillItem
+from ..bills.routes import BILL_ENTITIES, bills_query, count_query, bills_after, bills_page_query, bills_page
+from ..merchants.routes import (
+    STATEMENT_ENTITIES, SUMMARY_ENTITIES, statement_entries, decode_statement_cursor, statement_after, statement_until,
+    statement_opening_query, statement_page_query, statement_payload, summary_query, summary_items_query, summary_payload
+)
+from ..income.routes import (
+    INCOME_COLUMNS, INCOME_ENTITIES, INCOME_FIELDS, INCOME_INCLUDES, total_income_query, income_list_query,
+    income_merchants_query, income_selection, income_columnar_payload, income_fields,
+    income_summary_query, income_summary_payload
+)
+from ..utils.columnar import parse_format, columnar_fields, bill_columns
+from ..utils.helpers import parse_limit, parse_fieldset, business_date
+from ..utils.income import PERIODS
+from ..utils.serializers import BILL_FIELDS, BILL_INCLUDES, bill_includes, bill_merchant_ids, bill_dicts
+from .deps import (
+    flask_context, get_session, current_user_id, dumps, json_response, format_response,
+    data_etag, cache_headers, not_modified
+)
+
+# Async versions of the read-heavy GET endpoints. Each builds the same
+# statements as its Flask view (the query builders live next to the views)
+# and returns the same body and ETag, so a client can be pointed at either.
+
+router = APIRouter(prefix='/api', dependencies=[Depends(flask_context)])
+
+async def load_merchants(session, merchant_ids):
+    """Async load_merchants: {id: Merchant} in one query."""
+    ids = {mid for mid in merchant_ids if mid}
+    if not ids:
+        return {}
+    return {m.id: m for m in await session.scalars(select(Merchant).where(Merchant.id.in_(ids)))}
+
+async def load_bill_items(session, bill_ids):
+    """Async load_bill_items: {bill_id: [BillItem]} in one query."""
+    ids = set(bill_ids)
+    items_by_bill = {}
+    if not ids:
+        return items_by_bill
+    for item in await session.scalars(select(BillItem).where(BillItem.bill_id.in_(ids)).order_by(BillItem.id)):
+        items_by_bill.setdefault(item.bill_id, []).append(item)
+    return items_by_bill
+
+# ------------------- BILLS -------------------
+
+@router.get('/bills')
+async def get_bills(request: Request, user_id: int = Depends(current_user_id),
+                    session: AsyncSession = Depends(get_session)):
+    args = request.query_params
+    try:
+        limit = parse_limit(args.get('limit'))
+        fmt = parse_format(args.get('format'))
+        fields = parse_fieldset(args.get('fields'), BILL_FIELDS)
+        include = parse_fieldset(args.get('include'), BILL_INCLUDES, 'include', allow_empty=True)
+        merchant_id = int(args['merchant_id']) if args.get('merchant_id') else None
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if fmt != 'json':
+        fields = columnar_fields(fields)
+
+    etag = await data_etag(request, session, user_id, BILL_ENTITIES)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    query = bills_query(user_id, args.get('start_date'), args.get('end_date'),
+                        args.get('farmer_name'), args.get('village_name'), merchant_id)
+    include_total = args.get('include_total', '').lower() in ('1', 'true', 'yes')
+    total = await session.scalar(count_query(query)) if include_total else None
+    if args.get('cursor'):
+        try:
+            query = query.where(bills_after(args['cursor']))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+    bills = (await session.scalars(bills_page_query(query, limit, fields, include))).all()
+    bills, next_cursor = bills_page(bills, limit)
+    included = bill_includes(include)
+    items_by_bill = await load_bill_items(session, [bill.id for bill in bills]) if 'items' in included else {}
+    merchants = await load_merchants(session, bill_merchant_ids(bills, items_by_bill, included))
+
+    response = {'next_cursor': next_cursor, 'limit': limit}
+    if include_total:
+        response['total'] = total
+    if fmt != 'json':
+        payload = {**bill_columns(bills, items_by_bill, merchants, fields, include), **response}
+        return format_response(fmt, payload, cache_headers(etag))
+    response['bills'] = bill_dicts(bills, items_by_bill, merchants, fields, include)
+    return json_response(response, headers=cache_headers(etag))
+
+# ------------------- MERCHANTS -------------------
+
+@router.get('/merchants/summary')
+async def get_merchant_summary(request: Request, user_id: int = Depends(current_user_id),
+                               session: AsyncSession = Depends(get_session)):
+    args = request.query_params
+    etag = await data_etag(request, session, user_id, SUMMARY_ENTITIES)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    filter_date = datetime.strptime(args['date'], '%Y-%m-%d').date() if args.get('date') else business_date()
+    include = {part.strip() for part in args.get('include', '').split(',') if part.strip()}
+    rows = (await session.execute(summary_query(user_id, filter_date))).all()
+    items = []
+    if 'items' in include and rows:
+        items = (await session.scalars(summary_items_query(filter_date, [m.id for m, *_ in rows]))).all()
+    return json_response(summary_payload(rows, items, include, filter_date), headers=cache_headers(etag))
+
+@router.get('/merchants/{merchant_id}/statement')
+async def get_merchant_statement(merchant_id: int, request: Request, user_id: int = Depends(current_user_id),
+                                 session: AsyncSession = Depends(get_session)):
+    args = request.query_params
+    etag = await data_etag(request, session, user_id, STATEMENT_ENTITIES)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    merchant = await session.scalar(select(Merchant).where(Merchant.id == merchant_id, Merchant.user_id == user_id))
+    if not merchant:
+        raise HTTPException(404, 'Merchant not found')
+    try:
+        limit = parse_limit(args.get('limit'), default=100, maximum=500)
+        fmt = parse_format(args.get('format'))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    entries = statement_entries(merchant_id, user_id)
+    conditions = []
+    if args.get('end_date'):
+        conditions.append(statement_until(entries, args['end_date']))
+    if args.get('cursor'):
+        try:
+            cursor_date, cursor_kind, cursor_id, opening_balance = decode_statement_cursor(args['cursor'])
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        conditions.append(statement_after(entries, cursor_date, cursor_kind, cursor_id))
+    elif args.get('start_date'):
+        start = datetime.strptime(args['start_date'], '%Y-%m-%d')
+        opening_balance = float(await session.scalar(statement_opening_query(entries, start)))
+        conditions.append(entries.c.date >= start)
+    else:
+        opening_balance = 0.0
+
+    rows = (await session.execute(statement_page_query(entries, conditions, opening_balance, limit))).all()
+    payload = statement_payload(merchant, rows, opening_balance, limit, fmt)
+    if fmt != 'json':
+        return format_response(fmt, payload, cache_headers(etag))
+    return json_response(payload, headers=cache_headers(etag))
+
+# ------------------- INCOME -------------------
+
+@router.get('/income')
+async def get_income(request: Request, user_id: int = Depends(current_user_id),
+                     session: AsyncSession = Depends(get_session)):
+    args = request.query_params
+    start_date, end_date = args.get('start_date'), args.get('end_date')
+    try:
+        fmt = parse_format(args.get('format'))
+        fields = parse_fieldset(args.get('fields'), INCOME_FIELDS)
+        include = parse_fieldset(args.get('include'), INCOME_INCLUDES, 'include', allow_empty=True)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    etag = await data_etag(request, session, user_id, INCOME_ENTITIES)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    total_income = float(await session.scalar(total_income_query(user_id, start_date, end_date)))
+    with_merchant = include is None or 'merchant' in include
+    merchants = None
+    if with_merchant:
+        merchants = {m.id: m for m in await session.scalars(income_merchants_query(user_id))}
+
+    if fmt != 'json':
+        fields = INCOME_COLUMNS if fields is None else columnar_fields(fields)
+        rows = (await session.execute(
+            income_list_query(user_id, start_date, end_date, *income_selection(fields, with_merchant))
+        )).all()
+        return format_response(fmt, income_columnar_payload(rows, fields, merchants, total_income),
+                               cache_headers(etag))
+
+    # Streamed from a server-side cursor on its own session, which lives as long as the body
+    if fields is None and include is None:
+        query = income_list_query(user_id, start_date, end_date)
+        encode = lambda income: income.to_dict(merchants)
+    else:
+        fields = INCOME_FIELDS if fields is None else fields
+        query = income_list_query(user_id, start_date, end_date, *income_selection(fields, with_merchant))
+        encode = lambda row: income_fields(row, fields, merchants)
+    # The first batch is fetched before responding, so a failing query is still a 500;
+    # a failure after that raises out of the body and the server drops the connection
+    stream_session = request.app.state.sessions()
+    try:
+        result = await stream_session.stream(query.execution_options(yield_per=1000))
+        if fields is None and include is None:
+            result = result.scalars()
+        batches = result.partitions(500)
+        batch = await anext(batches, None)
+    except BaseException:
+        await stream_session.close()
+        raise
+
+    async def body():
+        try:
+            yield dumps({'total_income': total_income})[:-1] + b',"incomes":['
+            separator = b''
+            current = batch
+            while current is not None:
+                yield separator + dumps([encode(row) for row in current])[1:-1]
+                separator = b','
+                current = await anext(batches, None)
+            yield b']}'
+        finally:
+            await stream_session.close()
+
+    return StreamingResponse(body(), media_type='application/json', headers=cache_headers(etag))
+
+@router.get('/income/summary')
+async def get_income_summary(request: Request, user_id: int = Depends(current_user_id),
+                             session: AsyncSession = Depends(get_session)):
+    args = request.query_params
+    period = args.get('period', 'day')
+    if period not in PERIODS:
+        raise HTTPException(400, f'period must be one of {", ".join(PERIODS)}')
+    etag = await data_etag(request, session, user_id, INCOME_ENTITIES)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    results = (await session.execute(
+        income_summary_query(user_id, period, args.get('start_date'), args.get('end_date'))
+    )).all()
+    return json_response(income_summary_payload(results, period), headers=cache_headers(etag))
@@ -0,0 +1,106 @@
+import csv
+import json
+from .helpers import calculate_bill_totals
+
+# Parsing and validation for POST /api/bills/import. The parsers take any
+# iterable of lines (the request body stream), so rows are read one at a
+# time and the endpoint can stop as soon as an import is too big.
+#
+# JSON Lines: one bill per line, same shape as the POST /api/bills body.
+# CSV: one item per line; consecutive lines with the same bill_ref form one
+# bill and the bill-level columns are read from its first line:
+#   bill_ref,farmer_name,farmer_mobile,village_name,himmali,bharai,motor_bhada,
+#   other_charges,vegetable,bags,weight,rate,amount,merchant_id
+
+BILL_FIELDS = ('farmer_name', 'farmer_mobile', 'village_name', 'himmali', 'bharai', 'motor_bhada', 'other_charges')
+ITEM_FIELDS = ('vegetable', 'bags', 'weight', 'rate', 'amount', 'merchant_id')
+
+def parse_jsonl(lines):
+    """Yield (line number, bill dict or None, error or None)."""
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(data, dict):
+            yield line_no, None, 'Each line must be a JSON object'
+            continue
+        yield line_no, data, None
+
+def parse_csv(lines):
+    """Yield (line number of the bill's first row, bill dict, None)."""
+    reader = csv.DictReader(lines)
+    current_ref, current_line, bill = None, None, None
+    for row in reader:
+        ref = (row.get('bill_ref') or '').strip() or f'line-{reader.line_num}'
+        if ref != current_ref:
+            if bill is not None:
+                yield current_line, bill, None
+            current_ref, current_line = ref, reader.line_num
+            bill = {field: row.get(field) for field in BILL_FIELDS}
+            bill['items'] = []
+        if row.get('vegetable'):
+            bill['items'].append({field: row.get(field) for field in ITEM_FIELDS})
+    if bill is not None:
+        yield current_line, bill, None
+
+def _number(value, cast, name, default=None):
+    if value in (None, ''):
+        if default is None:
+            raise ValueError(f'{name} is required')
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number')
+
+def normalize_items(items_data):
+    """Validate incoming bill items and coerce them to column values. Raises ValueError."""
+    items = []
+    for index, item in enumerate(items_data or [], start=1):
+        try:
+            vegetable = (item.get('vegetable') or '').strip()
+            if not vegetable:
+                raise ValueError('vegetable is required')
+            merchant_id = item.get('merchant_id')
+            items.append({
+                'vegetable': vegetable,
+                'bags': _number(item.get('bags'), int, 'bags'),
+                'weight': _number(item.get('weight'), float, 'weight'),
+                'rate': _number(item.get('rate'), float, 'rate'),
+                'amount': _number(item.get('amount'), float, 'amount'),
+                'merchant_id': int(merchant_id) if merchant_id not in (None, '') else None
+            })
+        except (TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f'item {index}: {e}')
+    return items
+
+def normalize_bill(data):
+    """Validate one incoming bill and coerce it to column values. Raises ValueError."""
+    farmer_name = (data.get('farmer_name') or '').strip()
+    village_name = (data.get('village_name') or '').strip()
+    if not farmer_name:
+        raise ValueError('farmer_name is required')
+    if not village_name:
+        raise ValueError('village_name is required')
+
+    items = normalize_items(data.get('items'))
+
+    charges = {
+        name: _number(data.get(name), float, name, default=0.0)
+        for name in ('himmali', 'bharai', 'motor_bhada', 'other_charges')
+    }
+    totals = calculate_bill_totals(items, **charges)
+
+    bill = {
+        'farmer_name': farmer_name,
+        'farmer_mobile': data.get('farmer_mobile') or None,
+        'village_name': village_name,
+        'merchant_id': _number(data.get('merchant_id'), int, 'merchant_id', default=0) or None,
+        **charges,
+        **totals
+    }
+    return bill, items
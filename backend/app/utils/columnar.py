@@ -0,0 +1,77 @@
+from flask import request, jsonify, current_app
+from .serializers import load_bill_items, load_merchants, plain_value, bill_includes, bill_merchant_ids
+
+# Opt-in compact list format (?format=columnar, or ?format=msgpack for the
+# same structure in MessagePack). Each list becomes {column: [values]}, and
+# merchants are sent once in a `merchants` table that rows reference by
+# merchant_id instead of embedding Merchant.to_dict() in every row.
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional
+    msgpack = None
+
+FORMATS = ('json', 'columnar', 'msgpack')
+
+BILL_COLUMNS = ('id', 'bill_number', 'farmer_name', 'farmer_mobile', 'village_name', 'merchant_id',
+                'total_bags', 'total_weight', 'himmali', 'bharai', 'motor_bhada', 'other_charges',
+                'subtotal', 'grand_total', 'business_date', 'created_at', 'updated_at')
+ITEM_COLUMNS = ('id', 'bill_id', 'vegetable', 'bags', 'weight', 'rate', 'amount', 'merchant_id')
+
+def parse_format(fmt):
+    """Validate a ?format= value (None means json). Raises ValueError if unknown or unavailable."""
+    fmt = fmt or 'json'
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if fmt == 'msgpack' and msgpack is None:
+        raise ValueError('msgpack is not installed on this server')
+    return fmt
+
+def requested_format():
+    return parse_format(request.args.get('format'))
+
+def columnar_fields(fields):
+    """A ?fields= selection for a columnar list, with merchant_id always added (None stays None).
+
+    Rows reference the merchants table by merchant_id, so it is sent even
+    when the client did not ask for it.
+    """
+    if fields is None or 'merchant_id' in fields:
+        return fields
+    return fields + ('merchant_id',)
+
+def columns(rows, names):
+    """Column arrays from objects or Row tuples: {name: [value, ...]}."""
+    return {name: [plain_value(getattr(row, name)) for row in rows] for name in names}
+
+def merchant_table(merchants):
+    """Dictionary table for merchant_id references: {'id': [...], 'name': [...], 'business_name': [...]}."""
+    ordered = sorted(merchants.values(), key=lambda m: m.id)
+    return columns(ordered, ('id', 'name', 'business_name'))
+
+def bill_columns(bills, items_by_bill, merchants, fields=None, include=None):
+    """Column arrays from preloaded items and merchants, as bill_dicts takes them; runs no queries."""
+    include = bill_includes(include)
+    payload = {'bills': columns(bills, BILL_COLUMNS if fields is None else columnar_fields(fields))}
+    if 'items' in include:
+        payload['items'] = columns([item for bill in bills for item in items_by_bill.get(bill.id, [])], ITEM_COLUMNS)
+    if merchants:
+        payload['merchants'] = merchant_table(merchants)
+    return payload
+
+def columnar_bills(bills, fields=None, include=None):
+    """Bills, their items and the merchants they reference, as column arrays (two queries).
+
+    fields / include work as in serialize_bills; a merchants table is sent when
+    any merchant is included.
+    """
+    included = bill_includes(include)
+    items_by_bill = load_bill_items(bill.id for bill in bills) if 'items' in included else {}
+    merchants = load_merchants(bill_merchant_ids(bills, items_by_bill, included))
+    return bill_columns(bills, items_by_bill, merchants, fields, include)
+
+def columnar_response(fmt, payload, status=200):
+    payload = {'format': 'columnar', **payload}
+    if fmt == 'msgpack':
+        return current_app.response_class(msgpack.packb(payload), status=status, mimetype='application/msgpack')
+    return jsonify(payload), status
@@ -0,0 +1,111 @@
+import textwrap
+
+# ESC/POS rendering of a bill for 80 mm (48 column) and 58 mm (32 column)
+# thermal printers. Input is the same context dict the HTML pages are
+# rendered from (print_render.bill_page_context). Text is sent in the
+# printer's default code page (PC437), so labels are English and
+# characters the printer cannot show come out as '?'.
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+INIT = ESC + b'@'
+ALIGN_LEFT = ESC + b'a\x00'
+ALIGN_CENTER = ESC + b'a\x01'
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+SIZE_NORMAL = GS + b'!\x00'
+SIZE_DOUBLE = GS + b'!\x11'
+SIZE_TALL = GS + b'!\x01'
+FEED_AND_CUT = GS + b'V\x42\x03'
+
+ENCODING = 'cp437'
+
+def _text(value):
+    return str(value if value is not None else '').encode(ENCODING, errors='replace')
+
+def _money(value):
+    return f'{value or 0:.2f}'
+
+class _Receipt:
+    def __init__(self, columns):
+        self.columns = columns
+        self.parts = [INIT]
+
+    def raw(self, *commands):
+        self.parts.extend(commands)
+
+    def line(self, text=''):
+        self.parts.append(_text(text) + b'\n')
+
+    def wrapped(self, text, width=None):
+        for part in textwrap.wrap(str(text), width or self.columns) or ['']:
+            self.line(part)
+
+    def rule(self, char='-'):
+        self.line(char * self.columns)
+
+    def pair(self, left, right, width=None):
+        width = width or self.columns
+        left = str(left)[:max(0, width - len(str(right)) - 1)]
+        self.line(left + ' ' * (width - len(left) - len(str(right))) + str(right))
+
+    def build(self):
+        return b''.join(self.parts)
+
+def render_escpos(context, columns=48):
+    """Bill as an ESC/POS byte stream, ending with a feed and partial cut."""
+    user, bill, items = context['user'], context['bill'], context['items']
+    receipt = _Receipt(columns)
+
+    receipt.raw(ALIGN_CENTER, BOLD_ON, SIZE_DOUBLE)
+    receipt.wrapped(user['company_name'] or 'KRISHNA TRADERS', columns // 2)
+    receipt.raw(SIZE_NORMAL, BOLD_OFF)
+    if user['address']:
+        receipt.wrapped(user['address'])
+    partners = ', '.join(f"{p.get('name', '')} - {p.get('mobile', '')}" for p in user['partners'] if p)
+    if partners:
+        receipt.wrapped(partners)
+    receipt.raw(ALIGN_LEFT)
+    receipt.rule()
+
+    created_at = bill['created_at'].strftime('%d-%m-%Y') if bill['created_at'] else ''
+    receipt.pair(f"Bill: {bill['bill_number'] or 'N/A'}", created_at)
+    receipt.line(f"Farmer: {bill['farmer_name'] or 'N/A'}")
+    receipt.line(f"Village: {bill['village_name'] or 'N/A'}")
+    receipt.rule()
+
+    # 80 mm: name and numbers on one line; 58 mm: name on its own line above the numbers
+    widths = (5, 9, 8, 11) if columns >= 48 else (5, 8, 8, 11)
+    name_width = columns - sum(widths)
+
+    def item_row(name, *numbers):
+        cells = [' ' + str(number).rjust(width - 1) for number, width in zip(numbers, widths)]
+        if name_width < 8:
+            receipt.line(str(name))
+            receipt.line(''.join(cells).rjust(columns))
+        else:
+            receipt.line(str(name)[:name_width].ljust(name_width) + ''.join(cells))
+
+    receipt.raw(BOLD_ON)
+    item_row('Item', 'Bags', 'Wt(kg)', 'Rate', 'Amount')
+    receipt.raw(BOLD_OFF)
+    for item in items:
+        item_row(item['vegetable'] or 'N/A', item['bags'] or 0, _money(item['weight']),
+                 _money(item['rate']), _money(item['amount']))
+    receipt.rule()
+    item_row('Total', bill['total_bags'] or 0, _money(bill['total_weight']), '', _money(bill['subtotal']))
+    receipt.rule()
+
+    for label, key in (('Hammali', 'himmali'), ('Bharai', 'bharai'),
+                       ('Motor Bhada', 'motor_bhada'), ('Other Charges', 'other_charges')):
+        receipt.pair(label, _money(bill[key]))
+    receipt.rule('=')
+
+    receipt.raw(BOLD_ON, SIZE_TALL)
+    receipt.pair('NET AMOUNT', f"Rs. {_money(bill['grand_total'])}")
+    receipt.raw(SIZE_NORMAL, BOLD_OFF)
+    receipt.wrapped(f"Rupees {context['amount_in_words']} Only")
+    receipt.line()
+    receipt.raw(FEED_AND_CUT)
+    return receipt.build()
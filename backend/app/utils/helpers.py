@@ -1,4 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from flask import current_app
+from num2words import num2words
+import base64
+import json
 import random
 import string
 
@@ -7,9 +12,32 @@ def generate_bill_number():
     random_suffix = ''.join(random.choices(string.digits, k=4))
     return f"BILL-{timestamp}-{random_suffix}"
 
+def generate_bill_numbers(count):
+    """Generate count distinct bill numbers in one go (bulk import)."""
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    digits = max(4, len(str(count)) + 1)
+    suffixes = random.sample(range(10 ** digits), count)
+    return [f"BILL-{timestamp}-{suffix:0{digits}d}" for suffix in suffixes]
+
+def business_date(moment=None):
+    """Mandi trading day of a naive UTC timestamp (default: now).
+
+    Uses MANDI_TIMEZONE and BUSINESS_DAY_CUTOFF_HOUR, so with a cutoff of 4
+    a sale at 02:30 IST still counts towards the previous day's books.
+    """
+    moment = moment or datetime.utcnow()
+    local = moment.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(current_app.config['MANDI_TIMEZONE']))
+    return (local - timedelta(hours=current_app.config['BUSINESS_DAY_CUTOFF_HOUR'])).date()
+
 def calculate_adhatiya(amount, rate=2.0):
     return round((amount * rate) / 100, 2)
 
+def amount_in_words(amount):
+    """Rupee amount in words with Indian numbering (lakh, crore), paise dropped."""
+    if not amount or amount <= 0:
+        return "Zero"
+    return num2words(int(amount), lang='en_IN').title()
+
 def calculate_bill_totals(items, himmali=0,bharai=0, motor_bhada=0, other_charges=0):
     total_bags = sum(item.get('bags', 0) for item in items)
     total_weight = sum(item.get('weight', 0) for item in items)
@@ -23,3 +51,45 @@ def calculate_bill_totals(items, himmali=0,bharai=0, motor_bhada=0, other_charge
         'subtotal': subtotal,
         'grand_total': grand_total
     }
+
+
+def encode_cursor(*values):
+    """Pack keyset values into an opaque, URL-safe pagination cursor."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Unpack a cursor made by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def parse_limit(value, default=50, maximum=200):
+    """Clamp a ?limit= query value to 1..maximum."""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+def parse_fieldset(value, allowed, name='fields', allow_empty=False):
+    """Parse a comma-separated ?fields= / ?include= value against the allowed names.
+
+    Returns None when the parameter is absent, otherwise the requested names in
+    `allowed` order.
+    """
+    if value is None:
+        return None
+    requested = {part.strip() for part in value.split(',') if part.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown {name}: {', '.join(sorted(unknown))}")
+    if not requested and not allow_empty:
+        raise ValueError(f'{name} must name at least one field')
+    return tuple(field for field in allowed if field in requested)
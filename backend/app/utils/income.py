@@ -0,0 +1,103 @@
+from collections import defaultdict
+from datetime import date
+from flask import current_app
+from sqlalchemy import func, insert
+from ..models.models import db, AdhatiyaIncome, IncomeRollup
+from .upsert import upsert_insert
+
+# adhatiya_income keeps one row per merchant item; income_rollups keeps the
+# day/month/season totals the income reports read. Write adhatiya rows only
+# through add_income_rows / delete_income_rows so the two never drift apart.
+
+PERIODS = ('day', 'month', 'season')
+
+def season_start(day):
+    """First day of the season containing day (MANDI_SEASON_START_MONTHS)."""
+    months = sorted(current_app.config['MANDI_SEASON_START_MONTHS'])
+    started = [month for month in months if month <= day.month]
+    if started:
+        return date(day.year, started[-1], 1)
+    return date(day.year - 1, months[-1], 1)
+
+def period_start(period, day):
+    if period == 'day':
+        return day
+    if period == 'month':
+        return day.replace(day=1)
+    if period == 'season':
+        return season_start(day)
+    raise ValueError(f'period must be one of {", ".join(PERIODS)}')
+
+def apply_income(user_id, totals, sign=1):
+    """Add (or with sign=-1 subtract) grouped income into every rollup period.
+
+    totals: iterable of (merchant_id, date, trade_amount, commission_amount, entries).
+    """
+    deltas = defaultdict(lambda: [0.0, 0.0, 0])
+    for merchant_id, day, trade_amount, commission_amount, entries in totals:
+        for period in PERIODS:
+            delta = deltas[(period, period_start(period, day), merchant_id)]
+            delta[0] += sign * float(trade_amount)
+            delta[1] += sign * float(commission_amount)
+            delta[2] += sign * int(entries)
+    if not deltas:
+        return
+
+    # Sorted keys keep concurrent writers from locking rollup rows in opposite orders
+    rows = [
+        {
+            'user_id': user_id, 'period': period, 'period_start': start, 'merchant_id': merchant_id,
+            'trade_amount': trade, 'commission_amount': commission, 'entries': entries
+        }
+        for (period, start, merchant_id), (trade, commission, entries) in sorted(deltas.items())
+    ]
+    stmt = upsert_insert(IncomeRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'period', 'period_start', 'merchant_id'],
+        set_={
+            'trade_amount': IncomeRollup.trade_amount + stmt.excluded.trade_amount,
+            'commission_amount': IncomeRollup.commission_amount + stmt.excluded.commission_amount,
+            'entries': IncomeRollup.entries + stmt.excluded.entries
+        }
+    )
+    db.session.execute(stmt, rows)
+
+    if sign < 0:
+        IncomeRollup.query.filter(IncomeRollup.user_id == user_id, IncomeRollup.entries <= 0) \
+            .delete(synchronize_session=False)
+
+def add_income_rows(user_id, rows):
+    """Insert adhatiya_income rows (dicts) with one executemany and roll them up."""
+    if not rows:
+        return
+    db.session.execute(insert(AdhatiyaIncome), rows)
+    apply_income(user_id, (
+        (row['merchant_id'], row['date'], row['trade_amount'], row['commission_amount'], 1) for row in rows
+    ))
+
+def delete_income_rows(user_id, *criteria):
+    """Delete the user's adhatiya_income rows matching criteria and take them out of the rollups."""
+    query = AdhatiyaIncome.query.filter(AdhatiyaIncome.user_id == user_id, *criteria)
+    removed = query.with_entities(
+        AdhatiyaIncome.merchant_id,
+        AdhatiyaIncome.date,
+        func.sum(AdhatiyaIncome.trade_amount),
+        func.sum(AdhatiyaIncome.commission_amount),
+        func.count(AdhatiyaIncome.id)
+    ).group_by(AdhatiyaIncome.merchant_id, AdhatiyaIncome.date).all()
+    if removed:
+        query.delete(synchronize_session=False)
+        apply_income(user_id, removed, sign=-1)
+
+def rebuild_income_rollups(user_id):
+    """Recompute a user's rollups from adhatiya_income."""
+    IncomeRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    totals = db.session.query(
+        AdhatiyaIncome.merchant_id,
+        AdhatiyaIncome.date,
+        func.sum(AdhatiyaIncome.trade_amount),
+        func.sum(AdhatiyaIncome.commission_amount),
+        func.count(AdhatiyaIncome.id)
+    ).filter(AdhatiyaIncome.user_id == user_id) \
+     .group_by(AdhatiyaIncome.merchant_id, AdhatiyaIncome.date).all()
+    apply_income(user_id, totals)
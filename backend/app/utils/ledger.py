@@ -0,0 +1,138 @@
+from sqlalchemy import func, select
+from ..models.models import db, Merchant, MerchantLedger, MerchantBalanceSnapshot, BillItem, Transaction
+
+# Every write that changes what a merchant owes goes through post_entry.
+# The merchant row caches the running totals, so reading a balance is a
+# primary-key lookup, and a snapshot every SNAPSHOT_INTERVAL entries bounds
+# how much history a statement has to replay.
+
+SNAPSHOT_INTERVAL = 500
+
+def lock_merchant(merchant_id, user_id):
+    """Fetch a merchant with a row lock (SELECT ... FOR UPDATE) so balance updates serialise."""
+    return db.session.query(Merchant).with_for_update() \
+        .filter_by(id=merchant_id, user_id=user_id).first()
+
+def lock_merchants(merchant_ids, user_id):
+    """Lock several merchants in one query, in id order so concurrent writers cannot deadlock.
+
+    Returns {id: Merchant} for the ids that belong to the user.
+    """
+    ids = sorted({mid for mid in merchant_ids if mid})
+    if not ids:
+        return {}
+    merchants = db.session.query(Merchant).with_for_update() \
+        .filter(Merchant.id.in_(ids), Merchant.user_id == user_id) \
+        .order_by(Merchant.id).all()
+    return {m.id: m for m in merchants}
+
+def post_entry(merchant, entry_type, debit=0.0, credit=0.0, bill_id=None, transaction_id=None, description=None):
+    """Append a signed ledger entry and move the merchant's cached totals.
+
+    The caller must hold the merchant's row lock. Zero-amount entries are skipped.
+    """
+    if not debit and not credit:
+        return None
+
+    merchant.total_trade = (merchant.total_trade or 0) + debit
+    merchant.total_credit = (merchant.total_credit or 0) + credit
+    merchant.current_balance = merchant.total_trade - merchant.total_credit
+    merchant.ledger_sequence = (merchant.ledger_sequence or 0) + 1
+
+    entry = MerchantLedger(
+        user_id=merchant.user_id,
+        merchant_id=merchant.id,
+        sequence=merchant.ledger_sequence,
+        entry_type=entry_type,
+        bill_id=bill_id,
+        transaction_id=transaction_id,
+        debit=debit,
+        credit=credit,
+        running_balance=merchant.current_balance,
+        description=description
+    )
+    db.session.add(entry)
+
+    if merchant.ledger_sequence % SNAPSHOT_INTERVAL == 0:
+        db.session.add(MerchantBalanceSnapshot(
+            merchant_id=merchant.id,
+            ledger_sequence=merchant.ledger_sequence,
+            balance=merchant.current_balance,
+            total_trade=merchant.total_trade,
+            total_credit=merchant.total_credit
+        ))
+    return entry
+
+def latest_snapshot(merchant_id, as_of=None):
+    query = MerchantBalanceSnapshot.query.filter_by(merchant_id=merchant_id)
+    if as_of is not None:
+        query = query.filter(MerchantBalanceSnapshot.created_at <= as_of)
+    return query.order_by(MerchantBalanceSnapshot.ledger_sequence.desc()).first()
+
+def entries_since_snapshot(merchant_id):
+    """Return (snapshot or None, ledger entries posted after it, oldest first)."""
+    snapshot = latest_snapshot(merchant_id)
+    after = snapshot.ledger_sequence if snapshot else 0
+    entries = MerchantLedger.query.filter(
+        MerchantLedger.merchant_id == merchant_id,
+        MerchantLedger.sequence > after
+    ).order_by(MerchantLedger.sequence).all()
+    return snapshot, entries
+
+def balance_before_query(merchant_id, before):
+    """Select the balance just before a point in time: the last snapshot before it plus the entries since.
+
+    Built as one statement so the async read API can run it too.
+    """
+    snapshot = select(MerchantBalanceSnapshot.ledger_sequence, MerchantBalanceSnapshot.balance).where(
+        MerchantBalanceSnapshot.merchant_id == merchant_id,
+        MerchantBalanceSnapshot.created_at < before
+    ).order_by(MerchantBalanceSnapshot.ledger_sequence.desc()).limit(1).subquery()
+
+    delta = select(func.coalesce(func.sum(MerchantLedger.debit - MerchantLedger.credit), 0)).where(
+        MerchantLedger.merchant_id == merchant_id,
+        MerchantLedger.sequence > func.coalesce(select(snapshot.c.ledger_sequence).scalar_subquery(), 0),
+        MerchantLedger.created_at < before
+    ).scalar_subquery()
+
+    return select(func.coalesce(select(snapshot.c.balance).scalar_subquery(), 0) + delta)
+
+def balance_as_of(merchant_id, as_of):
+    """Balance just before as_of (see balance_before_query)."""
+    return float(db.session.execute(balance_before_query(merchant_id, as_of)).scalar())
+
+def source_totals_query(user_id=None):
+    """One query returning (Merchant, total_trade, total_credit) recomputed from bill items and credits."""
+    merchant_ids = db.session.query(Merchant.id)
+    if user_id is not None:
+        merchant_ids = merchant_ids.filter(Merchant.user_id == user_id)
+
+    trade_totals = db.session.query(
+        BillItem.merchant_id.label('merchant_id'),
+        func.sum(BillItem.amount).label('total_trade')
+    ).filter(BillItem.merchant_id.in_(merchant_ids)) \
+     .group_by(BillItem.merchant_id).subquery()
+
+    credit_totals = db.session.query(
+        Transaction.merchant_id.label('merchant_id'),
+        func.sum(Transaction.amount).label('total_credit')
+    ).filter(Transaction.merchant_id.in_(merchant_ids), Transaction.transaction_type == 'credit') \
+     .group_by(Transaction.merchant_id).subquery()
+
+    query = db.session.query(
+        Merchant,
+        func.coalesce(trade_totals.c.total_trade, 0).label('total_trade'),
+        func.coalesce(credit_totals.c.total_credit, 0).label('total_credit')
+    ).outerjoin(trade_totals, trade_totals.c.merchant_id == Merchant.id) \
+     .outerjoin(credit_totals, credit_totals.c.merchant_id == Merchant.id)
+    if user_id is not None:
+        query = query.filter(Merchant.user_id == user_id)
+    return query.order_by(Merchant.id)
+
+def reconcile_merchant(merchant, total_trade, total_credit):
+    """Post an adjustment entry if the cached totals drifted from the source rows."""
+    debit = round(float(total_trade) - (merchant.total_trade or 0), 2)
+    credit = round(float(total_credit) - (merchant.total_credit or 0), 2)
+    entry_type = 'adjustment' if merchant.ledger_sequence else 'opening'
+    return post_entry(merchant, entry_type, debit=debit, credit=credit,
+                      description='Reconciled with bill items and credit transactions')
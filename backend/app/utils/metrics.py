@@ -0,0 +1,217 @@
+import hmac
+import math
+import time
+from bisect import bisect_left
+from threading import Lock
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from ..models.models import db
+from .cache import LRUCache
+
+# Request instrumentation installed by create_app. Engine events count the
+# SQL statements each request runs (time, slowest statement, rows), request
+# hooks send them back as a Server-Timing header, and /api/metrics exposes
+# per-endpoint histograms, connection pool state and cache hit counts in the
+# Prometheus text format. Metrics live in the worker process: with several
+# workers, scrape each one or aggregate on the Prometheus side.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+REQUEST_LABELS = ('method', 'endpoint', 'status')
+
+class Histogram:
+    """Thread-safe Prometheus histogram with one series per label-value tuple."""
+
+    def __init__(self, name, documentation, buckets, labels=REQUEST_LABELS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((values, list(counts), total) for values, (counts, total) in self._series.items())
+        for values, counts, total in series:
+            labels = label_text(self.labels, values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{format_bound(bound)}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+class Metrics:
+    """Per-process request histograms and pool counters, kept in app.extensions['metrics']."""
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            'mandi_http_request_duration_seconds', 'Request time, including streamed bodies.', LATENCY_BUCKETS)
+        self.request_queries = Histogram(
+            'mandi_http_request_sql_queries', 'SQL statements per request.', QUERY_BUCKETS)
+        self.request_sql_seconds = Histogram(
+            'mandi_http_request_sql_duration_seconds', 'Time spent in SQL statements per request.', LATENCY_BUCKETS)
+        self.request_rows = Histogram(
+            'mandi_http_request_sql_rows', 'Rows returned or changed by SQL statements per request '
+            '(as the driver reports them; SQLite only counts changed rows).', ROW_BUCKETS)
+        self.pool_checkouts = 0
+        self.pool_connects = 0
+        self._lock = Lock()
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def observe(self, labels, seconds, stats):
+        self.request_seconds.observe(seconds, *labels)
+        self.request_queries.observe(stats['queries'], *labels)
+        self.request_sql_seconds.observe(stats['seconds'], *labels)
+        self.request_rows.observe(stats['rows'], *labels)
+
+def label_text(names, values):
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+def format_bound(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+# ------------------- ENGINE EVENTS -------------------
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = g.get('sql_stats') if has_request_context() else None
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - context._metrics_started
+    stats['queries'] += 1
+    stats['seconds'] += elapsed
+    stats['slowest'] = max(stats['slowest'], elapsed)
+    if cursor.rowcount > 0:
+        stats['rows'] += cursor.rowcount
+
+# ------------------- REQUEST HOOKS -------------------
+
+def start_request():
+    g.request_started = time.perf_counter()
+    g.sql_stats = {'queries': 0, 'seconds': 0.0, 'slowest': 0.0, 'rows': 0}
+
+def server_timing(stats, elapsed):
+    """Server-Timing header value for one request's SQL stats (durations in ms)."""
+    return (f'sql;desc="{stats["queries"]} queries";dur={stats["seconds"] * 1000:.2f}, '
+            f'sql-slowest;dur={stats["slowest"] * 1000:.2f}, '
+            f'sql-rows;desc="{stats["rows"]}", '
+            f'total;dur={elapsed * 1000:.2f}')
+
+def request_labels(status):
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    return (request.method, endpoint, str(status))
+
+def finish_response(response):
+    """Send the SQL stats so far as Server-Timing; a streamed body's own queries come after it.
+
+    Streamed responses are observed when the server closes them, once the
+    whole body (and its queries) has been sent; stream_with_context runs
+    teardown_request both before and after the body.
+    """
+    stats = g.get('sql_stats')
+    if stats is None:
+        return response
+    g.response_status = response.status_code
+    if current_app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = server_timing(stats, time.perf_counter() - g.request_started)
+    if response.is_streamed:
+        g.observe_on_close = True
+        metrics, labels, started = current_app.extensions['metrics'], request_labels(response.status_code), g.request_started
+        response.call_on_close(lambda: metrics.observe(labels, time.perf_counter() - started, stats))
+    return response
+
+def record_request(exc=None):
+    """Observe a non-streamed request once it is done."""
+    stats = g.get('sql_stats')
+    if stats is None or g.get('observe_on_close'):
+        return
+    status = 500 if exc is not None else g.get('response_status', 500)
+    current_app.extensions['metrics'].observe(request_labels(status), time.perf_counter() - g.request_started, stats)
+
+# ------------------- /api/metrics -------------------
+
+def pool_lines(engine, config):
+    """Gauges for the engine's connection pool next to the configured pool_size/max_overflow."""
+    pool = engine.pool
+    options = config['SQLALCHEMY_ENGINE_OPTIONS']
+    values = [
+        ('mandi_db_pool_size', 'Configured pool_size.', options.get('pool_size', 0)),
+        ('mandi_db_pool_max_overflow', 'Configured max_overflow.', options.get('max_overflow', 0)),
+    ]
+    if hasattr(pool, 'checkedout'):
+        values += [
+            ('mandi_db_pool_checked_out', 'Connections in use.', pool.checkedout()),
+            ('mandi_db_pool_checked_in', 'Idle connections in the pool.', pool.checkedin()),
+            ('mandi_db_pool_overflow', 'Connections open beyond pool_size.', max(0, pool.overflow())),
+        ]
+    lines = []
+    for name, documentation, value in values:
+        lines += [f'# HELP {name} {documentation}', f'# TYPE {name} gauge', f'{name} {value}']
+    return lines
+
+def counter_lines(name, documentation, samples, label='cache'):
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} counter']
+    for key, value in samples:
+        lines.append(f'{name}{{{label_text((label,), (key,))}}} {value}' if key else f'{name} {value}')
+    return lines
+
+def metrics_view():
+    # Closed unless a scrape token is configured: the histograms map out every route's traffic and SQL time
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        return jsonify({'message': 'Not found'}), 404
+    scheme, _, given = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not hmac.compare_digest(given, token):
+        return jsonify({'message': 'Metrics token required'}), 401
+
+    metrics = current_app.extensions['metrics']
+    lines = []
+    for histogram in (metrics.request_seconds, metrics.request_queries,
+                      metrics.request_sql_seconds, metrics.request_rows):
+        lines += histogram.render()
+    lines += pool_lines(db.engine, current_app.config)
+    lines += counter_lines('mandi_db_pool_checkouts_total', 'Connections checked out of the pool.',
+                           [(None, metrics.pool_checkouts)])
+    lines += counter_lines('mandi_db_pool_connects_total', 'New database connections opened.',
+                           [(None, metrics.pool_connects)])
+    caches = sorted((name, cache) for name, cache in current_app.extensions.items() if isinstance(cache, LRUCache))
+    lines += counter_lines('mandi_cache_hits_total', 'In-process cache hits.',
+                           [(name, cache.hits) for name, cache in caches])
+    lines += counter_lines('mandi_cache_misses_total', 'In-process cache misses.',
+                           [(name, cache.misses) for name, cache in caches])
+    return current_app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+def init_metrics(app):
+    """Install the engine events, request hooks and /api/metrics on app."""
+    metrics = app.extensions['metrics'] = Metrics()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    event.listen(engine, 'checkout', lambda *args: metrics.count('pool_checkouts'))
+    event.listen(engine, 'connect', lambda *args: metrics.count('pool_connects'))
+
+    app.before_request(start_request)
+    app.after_request(finish_response)
+    app.teardown_request(record_request)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_view)
@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from flask import current_app
+from .. import bcrypt
+
+# bcrypt is deliberately slow. Hashing runs on a small per-process thread
+# pool (bcrypt releases the GIL), and at most PASSWORD_HASH_WORKERS +
+# PASSWORD_HASH_QUEUE requests may wait for it; beyond that we answer 503
+# straight away instead of letting a burst of logins starve billing requests.
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool and its queue are full."""
+
+_executor = None
+_slots = None
+_pool_pid = None
+_pool_lock = Lock()
+
+def _pool():
+    global _executor, _slots, _pool_pid
+    with _pool_lock:
+        if _executor is None or _pool_pid != os.getpid():
+            workers = current_app.config['PASSWORD_HASH_WORKERS']
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+            _slots = BoundedSemaphore(workers + current_app.config['PASSWORD_HASH_QUEUE'])
+            _pool_pid = os.getpid()
+        return _executor, _slots
+
+def _run(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+def hash_password(password):
+    return _run(bcrypt.generate_password_hash, password).decode('utf-8')
+
+def check_password(password_hash, password):
+    return _run(bcrypt.check_password_hash, password_hash, password)
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+from .helpers import amount_in_words
+
+# Batch printing renders bill pages in a process pool, so a day's worth of
+# bills does not hold the GIL of the web worker. Workers get plain dicts and
+# render _bill_page.html with their own Jinja environment; nothing here may
+# touch the database or the Flask app.
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')
+
+_environment = None
+_pool = None
+_pool_pid = None
+_pool_lock = Lock()
+
+def bill_page_context(user, bill, items):
+    """Picklable template context for one bill page."""
+    return {
+        'user': {
+            'company_name': user.company_name,
+            'address': user.address,
+            'partners': user.partners or []
+        },
+        'bill': {
+            column: getattr(bill, column)
+            for column in ('bill_number', 'farmer_name', 'village_name', 'created_at', 'total_bags',
+                           'total_weight', 'subtotal', 'himmali', 'bharai', 'motor_bhada',
+                           'other_charges', 'grand_total')
+        },
+        'items': [
+            {'vegetable': item.vegetable, 'bags': item.bags, 'rate': item.rate,
+             'weight': item.weight, 'amount': item.amount}
+            for item in items
+        ],
+        'amount_in_words': amount_in_words(bill.grand_total)
+    }
+
+def render_bill_page(context):
+    global _environment
+    if _environment is None:
+        _environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(['html']))
+    return Markup(_environment.get_template('_bill_page.html').render(**context))
+
+def print_pool(max_workers):
+    """The worker process pool, created on first use in each web worker process."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=max_workers)
+            _pool_pid = os.getpid()
+        return _pool
+
+def render_bill_pages(contexts, max_workers):
+    """Yield rendered pages in order; max_workers=0 renders in the calling process."""
+    if not max_workers or len(contexts) < 2:
+        return map(render_bill_page, contexts)
+    chunksize = max(1, len(contexts) // (max_workers * 4))
+    return print_pool(max_workers).map(render_bill_page, contexts, chunksize=chunksize)
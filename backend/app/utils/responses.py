@@ -0,0 +1,153 @@
+import zlib
+from datetime import date, time
+from itertools import islice
+from flask import current_app, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+# Response pipeline installed by create_app: a faster JSON provider,
+# gzip/brotli compression negotiated per request, and streamed encoding of
+# large arrays. orjson and brotli are optional; without them responses fall
+# back to Flask's own encoder and gzip.
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speedup
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/msgpack',
+    'text/html', 'text/plain', 'text/csv'
+}
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when it is installed.
+
+    The fallback is set up to write what orjson writes: ISO 8601 dates and
+    times (Flask's own encoder would use RFC 822), keys in insertion order,
+    raw UTF-8 and no whitespace, so responses do not depend on whether orjson
+    is present.
+    """
+    sort_keys = False
+    ensure_ascii = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_dumps(self, obj):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        if orjson is None:
+            return super().dumps(obj, separators=(',', ':'))
+        return self._orjson_dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.dumps(obj) if orjson is None else self._orjson_dumps(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def stream_json(items, key=None, batch_size=500, **fields):
+    """Stream a JSON array, encoding batch_size items at a time.
+
+    With key, the array is wrapped as {**fields, key: [...]}. items may be a
+    generator (e.g. over query.yield_per), so the whole list never sits in
+    memory as Python objects or as one encoded string.
+
+    The first batch is read before the response is returned, so a failing
+    query still raises in the view and gets an error status. Once the 200
+    has gone out an error can only be signalled by dropping the connection:
+    it is logged and re-raised, the server aborts the body, and the client
+    sees an incomplete response rather than a short but valid JSON document.
+    """
+    dumps = current_app.json.dumps
+    items = iter(items)
+    first = list(islice(items, batch_size))
+
+    def generate():
+        if key:
+            head = dumps(fields)[:-1]
+            yield head + (',' if fields else '') + dumps(key) + ':['
+        else:
+            yield '['
+        separator = ''
+        chunk = first
+        try:
+            while chunk:
+                yield separator + dumps(chunk)[1:-1]
+                separator = ','
+                chunk = list(islice(items, batch_size))
+        except Exception:
+            current_app.logger.exception('Streamed response failed after the status was sent')
+            raise
+        yield ']}' if key else ']'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+def _negotiate_encoding():
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+def _compressor(encoding):
+    config = current_app.config
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['BROTLI_QUALITY'])
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(config['GZIP_LEVEL'], zlib.DEFLATED, 31)  # 31: gzip container
+    return compressor.compress, compressor.flush
+
+def _compress_stream(chunks, process, finish):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+def compress_response(response):
+    """after_request hook: gzip/brotli bodies above COMPRESS_MIN_SIZE when the client accepts it."""
+    if (request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # The compressor is built here, while the app context is still active
+        response.response = _compress_stream(response.response, *_compressor(encoding))
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+            return response
+        process, finish = _compressor(encoding)
+        response.set_data(process(data) + finish())
+
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes differ per encoding, so the validator can only be weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
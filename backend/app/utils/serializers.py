@@ -0,0 +1,98 @@
+from collections import defaultdict
+from ..models.models import BillItem, Merchant
+
+# Set-based serialisation for list endpoints.
+# Related rows are fetched once per relationship for the whole result set,
+# so the number of queries stays the same whether we return 5 rows or 5,000.
+
+# Names accepted by ?fields= / ?include= on the bills list
+BILL_FIELDS = ('id', 'user_id', 'bill_number', 'farmer_name', 'farmer_mobile', 'village_name', 'merchant_id',
+               'total_bags', 'total_weight', 'himmali', 'bharai', 'motor_bhada', 'other_charges',
+               'subtotal', 'grand_total', 'business_date', 'created_at', 'updated_at')
+BILL_INCLUDES = ('merchant', 'items', 'items.merchant')
+ITEM_FIELDS = ('id', 'bill_id', 'vegetable', 'bags', 'weight', 'rate', 'amount', 'merchant_id',
+               'business_date', 'created_at')
+
+def plain_value(value):
+    """Dates and datetimes as ISO strings, as the models' to_dict methods return them."""
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+def fields_dict(row, fields):
+    """Just the given attributes of an ORM object or a Row, as a plain dict."""
+    return {name: plain_value(getattr(row, name)) for name in fields}
+
+def load_merchants(merchant_ids):
+    """Fetch merchants by id in a single query. Returns {id: Merchant}."""
+    ids = {mid for mid in merchant_ids if mid}
+    if not ids:
+        return {}
+    return {m.id: m for m in Merchant.query.filter(Merchant.id.in_(ids)).all()}
+
+def load_bill_items(bill_ids):
+    """Fetch items of many bills in a single query. Returns {bill_id: [BillItem]}."""
+    ids = set(bill_ids)
+    items_by_bill = defaultdict(list)
+    if not ids:
+        return items_by_bill
+    items = BillItem.query.filter(BillItem.bill_id.in_(ids)).order_by(BillItem.id).all()
+    for item in items:
+        items_by_bill[item.bill_id].append(item)
+    return items_by_bill
+
+def serialize_bill_items(items, merchants=None):
+    if merchants is None:
+        merchants = load_merchants(item.merchant_id for item in items)
+    return [item.to_dict(merchants) for item in items]
+
+def bill_includes(include):
+    """Normalise a bills ?include=: None means everything, items.merchant implies items."""
+    include = set(BILL_INCLUDES if include is None else include)
+    if 'items.merchant' in include:
+        include.add('items')
+    return include
+
+def bill_merchant_ids(bills, items_by_bill, include):
+    """Ids of the merchants embedded for an (already normalised) include set."""
+    merchant_ids = set()
+    if 'merchant' in include:
+        merchant_ids.update(bill.merchant_id for bill in bills)
+    if 'items.merchant' in include:
+        for items in items_by_bill.values():
+            merchant_ids.update(item.merchant_id for item in items)
+    return merchant_ids
+
+def bill_dicts(bills, items_by_bill, merchants, fields=None, include=None):
+    """Bills as dicts from preloaded {bill_id: [BillItem]} and {id: Merchant}; runs no queries."""
+    if fields is None and include is None:
+        return [bill.to_dict(merchants, items_by_bill.get(bill.id, [])) for bill in bills]
+
+    fields = BILL_FIELDS if fields is None else fields
+    include = bill_includes(include)
+    item_merchants = 'items.merchant' in include
+    result = []
+    for bill in bills:
+        data = fields_dict(bill, fields)
+        if 'merchant' in include:
+            merchant = merchants.get(bill.merchant_id)
+            data['merchant'] = merchant.to_dict() if merchant else None
+        if 'items' in include:
+            data['items'] = [
+                item.to_dict(merchants) if item_merchants else fields_dict(item, ITEM_FIELDS)
+                for item in items_by_bill.get(bill.id, [])
+            ]
+        result.append(data)
+    return result
+
+def serialize_bills(bills, fields=None, include=None):
+    """Serialise bills with their items and merchants: two queries in total.
+
+    fields / include (see BILL_FIELDS, BILL_INCLUDES) restrict the output; items
+    and merchants that are not included are not queried at all.
+    """
+    included = bill_includes(include)
+    items_by_bill = load_bill_items(bill.id for bill in bills) if 'items' in included else {}
+    merchants = load_merchants(bill_merchant_ids(bills, items_by_bill, included))
+    return bill_dicts(bills, items_by_bill, merchants, fields, include)
+
+def serialize_bill(bill):
+    return serialize_bills([bill])[0]
@@ -0,0 +1,11 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from ..models.models import db
+
+def upsert_insert(model):
+    """INSERT for the session's dialect that supports .on_conflict_do_update (Postgres, SQLite)."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise NotImplementedError(f'INSERT ... ON CONFLICT is not available on {dialect}')
@@ -0,0 +1,81 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response, g
+from flask_jwt_extended import get_jwt_identity
+from ..models.models import db, DataVersion
+from .helpers import business_date
+from .upsert import upsert_insert
+
+# Per-user data versions. Every write bumps the counters of the data it
+# touched, inside its own transaction; GET endpoints build their ETag from
+# the counters they depend on and answer If-None-Match with 304 after one
+# primary-key lookup, without touching bills, merchants or the ledger.
+#
+#   bills     bills, bill items, adhatiya income and its rollups
+#   merchants merchant rows (names, contact details)
+#   ledger    merchant balances: trades, credits, opening balances
+#   profile   the user's own profile
+
+ENTITIES = ('bills', 'merchants', 'ledger', 'profile')
+
+def bump_versions(user_id, *entities):
+    """Increment the user's counters for entities. Call right before commit: the row stays locked until then.
+
+    Writes pass only the entities whose rows actually changed, so a no-op
+    save does not invalidate every client's cached copy.
+    """
+    if not entities:
+        return
+    stmt = upsert_insert(DataVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'entity'],
+        set_={'version': DataVersion.version + 1}
+    )
+    db.session.execute(stmt, [
+        {'user_id': user_id, 'entity': entity, 'version': 1} for entity in sorted(set(entities))
+    ])
+
+def current_versions(user_id, entities):
+    """{entity: version} for the user, one query per request."""
+    cached = g.setdefault('data_versions', {})
+    missing = [entity for entity in entities if entity not in cached]
+    if missing:
+        cached.update({entity: 0 for entity in missing})
+        cached.update(db.session.query(DataVersion.entity, DataVersion.version).filter(
+            DataVersion.user_id == user_id,
+            DataVersion.entity.in_(missing)
+        ).all())
+    return {entity: cached[entity] for entity in entities}
+
+def version_etag(user_id, full_path, day, versions):
+    """ETag for a GET of full_path (path?query) given the trading day and {entity: version}."""
+    # The trading day is part of the key: endpoints default to "today" and must roll over at the cutoff
+    key = ':'.join([str(user_id), full_path, day.isoformat()] +
+                   [f'{entity}={version}' for entity, version in versions.items()])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def data_etag(user_id, entities):
+    return version_etag(user_id, request.full_path, business_date(), current_versions(user_id, entities))
+
+def versioned(*entities):
+    """Give a GET view an ETag from the user's data versions and answer If-None-Match with 304.
+
+    Goes under @jwt_required(). The versions are read before the view runs,
+    so a write landing in between can only make the ETag older than the
+    body, which costs the client one extra refetch, never a stale 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = data_etag(get_jwt_identity(), entities)
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
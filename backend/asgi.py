@@ -0,0 +1,5 @@
+from app import create_app
+from app.read_api import create_read_api
+
+# uvicorn asgi:app --workers 4
+app = create_read_api(create_app())
@@ -0,0 +1,7 @@
+# Performance tooling for the Flask backend. Run modules from backend/, e.g.
+#   python -m benchmarks.loader         synthetic tenants, bulk loaded (rows/s)
+#   python -m benchmarks.harness        per-route p50/p95/p99 and statement counts, vs a baseline
+#   python -m benchmarks.query_plans    fails when a route seq-scans a hot table
+#   python -m benchmarks.concurrency    parallel bill writers on shared merchants (bills/s, ledger check)
+# Every tool here drops and recreates the tables of DATABASE_URL (unless
+# --reuse is given), so always point it at a scratch database.
@@ -0,0 +1,131 @@
+"""Synthetic mandi tenants.
+
+A tenant is one commission agent (a user) with merchants, a pool of farmers
+from surrounding villages and a history of bills over one or more seasons.
+Bills are produced lazily, oldest first, so millions of bill items can be
+streamed into the loader without sitting in memory.
+
+The shapes follow a real yard rather than uniform noise: a few farmers and
+merchants account for most of the trade, vegetables only arrive in their
+season, Sundays are quiet, and all sales happen during the morning auction.
+"""
+import random
+from itertools import accumulate
+from datetime import datetime, timedelta
+from app.utils.helpers import calculate_bill_totals, business_date
+
+# name: (lowest rate, highest rate per kg, months it arrives in; None = all year)
+VEGETABLES = {
+    'Onion': (8, 40, None),
+    'Potato': (6, 30, None),
+    'Tomato': (5, 60, None),
+    'Garlic': (30, 200, None),
+    'Ginger': (20, 150, None),
+    'Brinjal': (8, 35, None),
+    'Chilli': (15, 80, None),
+    'Cauliflower': (8, 40, (10, 11, 12, 1, 2, 3)),
+    'Cabbage': (5, 25, (10, 11, 12, 1, 2, 3)),
+    'Peas': (15, 60, (11, 12, 1, 2)),
+    'Carrot': (10, 40, (11, 12, 1, 2, 3)),
+    'Spinach': (8, 30, (10, 11, 12, 1, 2)),
+    'Okra': (15, 60, (4, 5, 6, 7, 8, 9)),
+    'Bottle Gourd': (5, 25, (3, 4, 5, 6, 7, 8, 9)),
+    'Bitter Gourd': (15, 50, (4, 5, 6, 7, 8, 9)),
+    'Cucumber': (8, 30, (3, 4, 5, 6, 7, 8)),
+}
+VILLAGES = ['Sanwer', 'Depalpur', 'Mhow', 'Betma', 'Hatod', 'Kampel', 'Gautampura', 'Rau', 'Simrol', 'Manpur',
+            'Pigdamber', 'Khudel', 'Kshipra', 'Dharampuri', 'Chandrawatiganj', 'Palasia', 'Bhagirathpura',
+            'Rangwasa', 'Dakachya', 'Ajnod', 'Bijalpur', 'Tillore', 'Kanadiya', 'Bicholi']
+FIRST_NAMES = ['Ramesh', 'Suresh', 'Mahesh', 'Dinesh', 'Rajesh', 'Mukesh', 'Ganesh', 'Prakash', 'Kailash', 'Santosh',
+               'Mohan', 'Sohan', 'Gopal', 'Shankar', 'Bhagwan', 'Lakhan', 'Kishore', 'Mangilal', 'Bherulal', 'Kanhaiya']
+SURNAMES = ['Patel', 'Chouhan', 'Yadav', 'Solanki', 'Verma', 'Sharma', 'Malviya', 'Parmar', 'Jat', 'Panwar',
+            'Rathore', 'Goyal', 'Agrawal', 'Jain', 'Mandloi']
+
+SEASON_DAYS = 182
+# Monday..Sunday share of a normal day's arrivals
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 1.0, 1.1, 0.5)
+# Auction runs 05:00-13:00 IST, i.e. from 23:30 UTC the evening before
+AUCTION_START_UTC = timedelta(minutes=-30)
+AUCTION_SECONDS = 8 * 3600
+
+def skewed_weights(count, skew=1.0):
+    """Cumulative Zipf-like popularity for rng.choices: the first entries are picked far more often."""
+    return list(accumulate(1.0 / (rank + 1) ** skew for rank in range(count)))
+
+def person_name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}'
+
+def mobile(rng):
+    return str(rng.randint(6, 9)) + ''.join(str(rng.randrange(10)) for _ in range(9))
+
+def daily_counts(total, start, days, rng):
+    """Split total bills over days by weekday weight, with some day-to-day noise."""
+    weights = [WEEKDAY_WEIGHTS[(start + timedelta(days=d)).weekday()] * rng.uniform(0.7, 1.3) for d in range(days)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for d in rng.sample(range(days), total - sum(counts)):
+        counts[d] += 1
+    return counts
+
+def tenant(index, merchants=100, farmers=500, villages=20, vegetables=None, seasons=1, bills=2000,
+           items_per_bill=(1, 4), end=None, rng=None):
+    """One synthetic tenant.
+
+    Returns {'user': {...}, 'merchants': [{...}], 'bills': iterator of (bill, items)}.
+    bill and item dicts carry the bill/bill_items columns; items name their
+    merchant by index into 'merchants', since ids only exist once loaded.
+    Must run inside an app context (business dates use the mandi timezone).
+    """
+    rng = rng or random.Random(index)
+    vegetables = {name: VEGETABLES[name] for name in (vegetables or VEGETABLES)}
+    village_names = VILLAGES[:villages] if villages <= len(VILLAGES) else \
+        VILLAGES + [f'Village {n}' for n in range(len(VILLAGES), villages)]
+
+    user = {'company_name': f'{rng.choice(SURNAMES)} Traders {index}', 'email': f'bench{index}@mandi.test',
+            'mobile': mobile(rng), 'partners': []}
+    merchant_rows = [
+        {'name': person_name(rng), 'business_name': f'{rng.choice(SURNAMES)} Vegetable Co. {m}', 'mobile': mobile(rng)}
+        for m in range(merchants)
+    ]
+    farmer_pool = [(person_name(rng), mobile(rng) if rng.random() < 0.7 else None, rng.choice(village_names))
+                   for _ in range(farmers)]
+
+    def generate_bills():
+        farmer_weights = skewed_weights(len(farmer_pool), 0.8)
+        merchant_weights = skewed_weights(merchants, 1.1)
+        days = max(1, seasons * SEASON_DAYS)
+        last_day = (end or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+        first_day = last_day - timedelta(days=days - 1)
+        number = 0
+        for d, count in enumerate(daily_counts(bills, first_day, days, rng)):
+            day = first_day + timedelta(days=d)
+            in_season = [name for name, (_, _, months) in vegetables.items() if months is None or day.month in months]
+            moments = sorted(day + AUCTION_START_UTC + timedelta(seconds=rng.randrange(AUCTION_SECONDS))
+                             for _ in range(count))
+            for created_at in moments:
+                farmer_name, farmer_mobile, village = rng.choices(farmer_pool, cum_weights=farmer_weights)[0]
+                trading_day = business_date(created_at)
+                items = []
+                for vegetable in rng.sample(in_season, min(len(in_season), rng.randint(*items_per_bill))):
+                    low, high, _ = vegetables[vegetable]
+                    bags = max(1, int(rng.lognormvariate(2.3, 0.7)))
+                    weight = round(bags * rng.uniform(40, 60), 1)
+                    rate = round(rng.triangular(low, high, low + (high - low) * 0.35), 2)
+                    items.append({
+                        'vegetable': vegetable, 'bags': bags, 'weight': weight, 'rate': rate,
+                        'amount': round(weight * rate, 2),
+                        'merchant': rng.choices(range(merchants), cum_weights=merchant_weights)[0],
+                        'business_date': trading_day, 'created_at': created_at
+                    })
+                total_bags = sum(item['bags'] for item in items)
+                charges = {'himmali': float(total_bags * 5), 'bharai': float(total_bags * 2),
+                           'motor_bhada': float(rng.choice((0, 0, 200, 300, 500))), 'other_charges': 0.0}
+                totals = calculate_bill_totals(items, **charges)
+                yield {
+                    'bill_number': f'SEED-{index}-{number:08d}', 'farmer_name': farmer_name,
+                    'farmer_mobile': farmer_mobile, 'village_name': village, **charges, **totals,
+                    'business_date': trading_day, 'created_at': created_at, 'updated_at': created_at
+                }, items
+                number += 1
+
+    return {'user': user, 'merchants': merchant_rows, 'bills': generate_bills()}
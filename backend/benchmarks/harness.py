@@ -0,0 +1,199 @@
+"""Latency regression harness.
+
+Loads synthetic tenants (generator.py + loader.py), drives every API route
+through the Flask test client for a number of rounds and reports per-route
+p50/p95/p99 latency, SQL statements and SQL time per request, plus the
+loader's rows per second.
+
+    cd backend
+    python -m benchmarks.harness --bills 20000 --rounds 20 --save baseline.json
+    # ...change something...
+    python -m benchmarks.harness --bills 20000 --rounds 20 --baseline baseline.json
+
+With --baseline it exits non-zero when a route issues more statements per
+request than before, or its p95 grew by more than --tolerance (and by more
+than --min-ms, so sub-millisecond noise does not fail a run). Compare runs
+on the same machine, database and data size only.
+
+--reuse skips loading and benchmarks tenants already in DATABASE_URL (as
+left there by `python -m benchmarks.loader`); otherwise the tables are
+dropped and recreated first.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from statistics import mean, median
+
+PERCENTILES = (50, 95, 99)
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+
+class RouteTimer:
+    """Wall time, statement count and SQL time per route call, from engine events."""
+
+    def __init__(self):
+        self.route = None
+        self.samples = defaultdict(list)
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.query_started = 0.0
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.query_started = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.route is not None:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - self.query_started
+
+    @contextmanager
+    def record(self, route):
+        self.route, self.queries, self.sql_seconds = route, 0, 0.0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[route].append((time.perf_counter() - started, self.queries, self.sql_seconds))
+            self.route = None
+
+    @contextmanager
+    def discard(self, route):
+        yield
+
+    def report(self):
+        """{route: {'calls', 'p50', 'p95', 'p99', 'queries', 'sql_ms'}} with times in milliseconds."""
+        report = {}
+        for route, samples in self.samples.items():
+            elapsed = [seconds * 1000 for seconds, _, _ in samples]
+            report[route] = {
+                'calls': len(samples),
+                **{f'p{p}': round(percentile(elapsed, p), 3) for p in PERCENTILES},
+                'queries': median(queries for _, queries, _ in samples),
+                'sql_ms': round(mean(sql * 1000 for _, _, sql in samples), 3)
+            }
+        return report
+
+def existing_tenants():
+    """seed()-shaped ids for the bench tenants already in the database."""
+    from app.models.models import db, User, Merchant, Bill
+
+    seeded = {'users': [], 'merchant_ids': {}, 'bill_ids': {}, 'rows': 0}
+    users = db.session.execute(
+        db.select(User.id, User.email).where(User.email.like('bench%@mandi.test')).order_by(User.id)
+    ).all()
+    for user_id, email in users:
+        seeded['users'].append((user_id, email))
+        seeded['merchant_ids'][user_id] = db.session.scalars(
+            db.select(Merchant.id).where(Merchant.user_id == user_id).order_by(Merchant.id).limit(2)
+        ).all()
+        seeded['bill_ids'][user_id] = db.session.scalars(
+            db.select(Bill.id).where(Bill.user_id == user_id).order_by(Bill.id).limit(1)
+        ).all()
+    if not seeded['users']:
+        raise SystemExit('No bench tenants in the database; run python -m benchmarks.loader first')
+    return seeded
+
+def regressions(report, baseline, tolerance, min_ms):
+    """[(route, reason)] where report is worse than baseline."""
+    found = []
+    for route, before in baseline['routes'].items():
+        after = report['routes'].get(route)
+        if after is None:
+            continue
+        if after['queries'] > before['queries']:
+            found.append((route, f"statements {before['queries']:g} -> {after['queries']:g}"))
+        if after['p95'] > before['p95'] * (1 + tolerance) and after['p95'] - before['p95'] > min_ms:
+            found.append((route, f"p95 {before['p95']:.2f} -> {after['p95']:.2f} ms"))
+    return found
+
+def print_report(report):
+    print(f"{'route':<52} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>6} {'sql ms':>8}")
+    for route, stats in sorted(report['routes'].items()):
+        print(f"{route:<52} {stats['p50']:8.2f} {stats['p95']:8.2f} {stats['p99']:8.2f} "
+              f"{stats['queries']:6g} {stats['sql_ms']:8.2f}")
+    if report.get('load_rows_per_second'):
+        print(f"loaded {report['load_rows']:,} rows at {report['load_rows_per_second']:,.0f} rows/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1)
+    parser.add_argument('--merchants', type=int, default=100, help='merchants per user')
+    parser.add_argument('--farmers', type=int, default=500, help='farmers per user')
+    parser.add_argument('--villages', type=int, default=20, help='villages farmers come from')
+    parser.add_argument('--seasons', type=int, default=1, help='seasons (~6 months) of history')
+    parser.add_argument('--bills', type=int, default=5000, help='bills per user')
+    parser.add_argument('--rounds', type=int, default=10, help='timed passes over every route')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed passes first')
+    parser.add_argument('--reuse', action='store_true', help='benchmark the tenants already in DATABASE_URL')
+    parser.add_argument('--save', metavar='PATH', help='write the report as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='compare with a saved report; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed p95 growth (0.5 = 50%%)')
+    parser.add_argument('--min-ms', type=float, default=5.0, help='ignore p95 growth below this many ms')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'harness.db'))
+    os.environ.setdefault('METRICS_TOKEN', 'harness')  # so /api/metrics is served and timed too
+
+    from sqlalchemy import event
+    from app import create_app
+    from app.models.models import db
+    from .loader import sqlite_foreign_keys
+    from .seed import seed
+    from .routes import exercise_routes
+
+    app = create_app()
+    timer = RouteTimer()
+    with app.app_context():
+        report = {'database': db.engine.dialect.name, 'routes': {}}
+        sqlite_foreign_keys(db.engine)
+        if args.reuse:
+            seeded = existing_tenants()
+        else:
+            db.drop_all()
+            db.create_all()
+            started = time.perf_counter()
+            seeded = seed(users=args.users, merchants_per_user=args.merchants, bills_per_user=args.bills,
+                          farmers=args.farmers, villages=args.villages, seasons=args.seasons)
+            report['load_rows'] = seeded['rows']
+            report['load_rows_per_second'] = round(seeded['rows'] / (time.perf_counter() - started))
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql('ANALYZE')
+
+        client = app.test_client()
+        event.listen(db.engine, 'before_cursor_execute', timer.before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', timer.after_cursor_execute)
+        try:
+            for _ in range(args.warmup):
+                exercise_routes(client, seeded, timer.discard)
+            for _ in range(args.rounds):
+                exercise_routes(client, seeded, timer.record)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', timer.before_cursor_execute)
+            event.remove(db.engine, 'after_cursor_execute', timer.after_cursor_execute)
+    report['routes'] = timer.report()
+
+    print_report(report)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance, args.min_ms)
+        for route, reason in found:
+            print(f'REGRESSION {route}: {reason}')
+        if found:
+            return 1
+        print('OK: no regressions against', args.baseline)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
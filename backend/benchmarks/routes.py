@@ -0,0 +1,113 @@
+import json
+import uuid
+from datetime import datetime
+from .loader import PASSWORD
+
+def exercise_routes(client, seeded, record):
+    """Call every API route once through the Flask test client.
+
+    Each request runs inside ``record(route_name)``, a context-manager factory
+    the caller uses to attribute SQL statements or timings to the route.
+    Raises RuntimeError on any 4xx/5xx so a broken route cannot pass silently.
+    """
+    user_id, email = seeded['users'][0]
+    merchant_id = seeded['merchant_ids'][user_id][0]
+    other_merchant_id = seeded['merchant_ids'][user_id][1]
+    bill_id = seeded['bill_ids'][user_id][0]
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    headers = {}
+
+    def call(name, method, url, **kwargs):
+        with record(name):
+            response = client.open(url, method=method, headers=headers, **kwargs)
+            response.get_data()  # streamed bodies run their queries here
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        return response
+
+    # auth
+    call('POST /api/auth/register', 'POST', '/api/auth/register', json={
+        'company_name': 'Bench', 'email': f'{uuid.uuid4().hex}@mandi.test', 'mobile': '9', 'password': PASSWORD
+    })
+    tokens = call('POST /api/auth/login', 'POST', '/api/auth/login',
+                  json={'email': email, 'password': PASSWORD}).get_json()
+    headers['Authorization'] = f"Bearer {tokens['refresh_token']}"
+    tokens = call('POST /api/auth/refresh', 'POST', '/api/auth/refresh').get_json()
+    refresh_token = tokens['refresh_token']
+    headers['Authorization'] = f"Bearer {tokens['access_token']}"
+    call('GET /api/auth/profile', 'GET', '/api/auth/profile')
+    call('PUT /api/auth/profile', 'PUT', '/api/auth/profile', json={'address': 'Main Mandi Road'})
+
+    # bills
+    page = call('GET /api/bills', 'GET', '/api/bills', query_string={'include_total': 'true'}).get_json()
+    if page.get('next_cursor'):
+        call('GET /api/bills?cursor', 'GET', '/api/bills', query_string={'cursor': page['next_cursor']})
+    call('GET /api/bills?format=columnar', 'GET', '/api/bills', query_string={'format': 'columnar'})
+    call('GET /api/bills?fields', 'GET', '/api/bills', query_string={
+        'fields': 'id,bill_number,farmer_name,village_name,total_bags,total_weight,grand_total,created_at', 'include': ''
+    })
+    call('GET /api/bills?filters', 'GET', '/api/bills', query_string={
+        'start_date': '2000-01-01', 'end_date': today, 'farmer_name': 'Farmer 1',
+        'village_name': 'a', 'merchant_id': merchant_id
+    })
+    items = [
+        {'vegetable': 'Onion', 'bags': 10, 'weight': 500, 'rate': 20, 'amount': 10000, 'merchant_id': merchant_id},
+        {'vegetable': 'Potato', 'bags': 5, 'weight': 250, 'rate': 15, 'amount': 3750, 'merchant_id': other_merchant_id}
+    ]
+    new_bill = call('POST /api/bills', 'POST', '/api/bills', json={
+        'farmer_name': 'Bench Farmer', 'village_name': 'Sanwer', 'himmali': 50, 'items': items
+    }).get_json()
+    call('GET /api/bills/<id>', 'GET', f"/api/bills/{new_bill['id']}")
+    edited = [{'id': item['id'], **{k: item[k] for k in ('vegetable', 'bags', 'weight', 'rate', 'merchant_id')},
+               'amount': item['amount'] + 100} for item in new_bill['items']]
+    call('PUT /api/bills/<id>', 'PUT', f"/api/bills/{new_bill['id']}", json={'items': edited})
+    call('GET /api/bills/print/<id>', 'GET', f'/api/bills/print/{bill_id}')
+    call('GET /api/bills/print?date', 'GET', '/api/bills/print', query_string={'date': today})
+    call('DELETE /api/bills/<id>', 'DELETE', f"/api/bills/{new_bill['id']}")
+    lines = '\n'.join(json.dumps({'farmer_name': f'Import {i}', 'village_name': 'Mhow', 'items': items}) for i in range(20))
+    imported = call('POST /api/bills/import', 'POST', '/api/bills/import', data=lines,
+                    content_type='application/x-ndjson').get_json()
+    for bill in imported['bills']:
+        client.delete(f"/api/bills/{bill['id']}", headers=headers)
+
+    # merchants
+    call('GET /api/merchants', 'GET', '/api/merchants')
+    call('GET /api/merchants?fields', 'GET', '/api/merchants', query_string={'fields': 'id,name,current_balance'})
+    call('GET /api/merchants/directory', 'GET', '/api/merchants/directory')
+    merchant = call('POST /api/merchants', 'POST', '/api/merchants', json={
+        'name': 'Bench Merchant', 'mobile': '9', 'opening_balance': 500
+    }).get_json()['merchant']
+    call('PUT /api/merchants/<id>', 'PUT', f"/api/merchants/{merchant['id']}", json={'opening_balance': 750})
+    credit = call('POST /api/merchants/<id>/credit', 'POST', f'/api/merchants/{merchant_id}/credit',
+                  json={'amount': 1000, 'payment_mode': 'Cash'}).get_json()['transaction']
+    call('PUT /api/merchants/<id>/credit/<tid>', 'PUT', f"/api/merchants/{merchant_id}/credit/{credit['id']}",
+         json={'amount': 900})
+    call('DELETE /api/merchants/<id>/credit/<tid>', 'DELETE', f"/api/merchants/{merchant_id}/credit/{credit['id']}")
+    call('GET /api/merchants/<id>', 'GET', f'/api/merchants/{merchant_id}')
+    call('GET /api/merchants/<id>/ledger', 'GET', f'/api/merchants/{merchant_id}/ledger')
+    statement = call('GET /api/merchants/<id>/statement', 'GET', f'/api/merchants/{merchant_id}/statement',
+                     query_string={'start_date': '2000-01-01', 'limit': 50}).get_json()
+    if statement.get('next_cursor'):
+        call('GET /api/merchants/<id>/statement?cursor', 'GET', f'/api/merchants/{merchant_id}/statement',
+             query_string={'cursor': statement['next_cursor'], 'limit': 50})
+    call('GET /api/merchants/<id>/statement?format=columnar', 'GET', f'/api/merchants/{merchant_id}/statement',
+         query_string={'start_date': '2000-01-01', 'limit': 50, 'format': 'columnar'})
+    call('GET /api/merchants/summary', 'GET', '/api/merchants/summary', query_string={'date': today})
+    call('DELETE /api/merchants/<id>', 'DELETE', f"/api/merchants/{merchant['id']}")
+
+    # farmers / income
+    call('GET /api/farmers', 'GET', '/api/farmers', query_string={'date': today})
+    call('GET /api/income', 'GET', '/api/income', query_string={'start_date': today, 'end_date': today})
+    call('GET /api/income?format=columnar', 'GET', '/api/income',
+         query_string={'start_date': today, 'end_date': today, 'format': 'columnar'})
+    call('GET /api/income/summary', 'GET', '/api/income/summary', query_string={'start_date': today, 'end_date': today})
+
+    # instrumentation (only served when a scrape token is configured)
+    metrics_token = client.application.config['METRICS_TOKEN']
+    if metrics_token:
+        headers['Authorization'] = f'Bearer {metrics_token}'
+        call('GET /api/metrics', 'GET', '/api/metrics')
+
+    # auth teardown
+    headers['Authorization'] = f'Bearer {refresh_token}'
+    call('POST /api/auth/logout', 'POST', '/api/auth/logout')
@@ -0,0 +1,18 @@
+from .generator import tenant
+from .loader import load_tenant, password_hash
+
+def seed(users=2, merchants_per_user=100, bills_per_user=2000, **options):
+    """Fill the current database with synthetic tenants (generator.tenant options pass through).
+
+    Returns {'users': [(id, email)], 'merchant_ids': {user_id: [...]}, 'bill_ids': {user_id: [...]},
+    'rows': total rows written}. Must run inside an app context.
+    """
+    password = password_hash()
+    seeded = {'users': [], 'merchant_ids': {}, 'bill_ids': {}, 'rows': 0}
+    for index in range(users):
+        loaded = load_tenant(tenant(index, merchants=merchants_per_user, bills=bills_per_user, **options), password)
+        seeded['users'].append((loaded['user_id'], loaded['email']))
+        seeded['merchant_ids'][loaded['user_id']] = loaded['merchant_ids']
+        seeded['bill_ids'][loaded['user_id']] = loaded['bill_ids']
+        seeded['rows'] += loaded['rows']
+    return seeded
@@ -0,0 +1,41 @@
+-- Merchant ledger and cached balance totals.
+-- Fresh databases get all of this from db.create_all(); run this file once
+-- against an existing PostgreSQL database, then `flask --app run rebuild-ledger`
+-- from backend/ to post the opening entries.
+
+BEGIN;
+
+ALTER TABLE merchants ADD COLUMN IF NOT EXISTS total_trade DOUBLE PRECISION NOT NULL DEFAULT 0;
+ALTER TABLE merchants ADD COLUMN IF NOT EXISTS total_credit DOUBLE PRECISION NOT NULL DEFAULT 0;
+ALTER TABLE merchants ADD COLUMN IF NOT EXISTS ledger_sequence INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS merchant_ledger (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    merchant_id INTEGER NOT NULL REFERENCES merchants (id) ON DELETE CASCADE,
+    sequence INTEGER NOT NULL,
+    entry_type VARCHAR(30) NOT NULL,
+    bill_id INTEGER,
+    transaction_id INTEGER,
+    debit DOUBLE PRECISION NOT NULL DEFAULT 0,
+    credit DOUBLE PRECISION NOT NULL DEFAULT 0,
+    running_balance DOUBLE PRECISION NOT NULL,
+    description VARCHAR(255),
+    created_at TIMESTAMP WITHOUT TIME ZONE,
+    CONSTRAINT uq_merchant_ledger_merchant_sequence UNIQUE (merchant_id, sequence)
+);
+
+CREATE TABLE IF NOT EXISTS merchant_balance_snapshots (
+    id SERIAL PRIMARY KEY,
+    merchant_id INTEGER NOT NULL REFERENCES merchants (id) ON DELETE CASCADE,
+    ledger_sequence INTEGER NOT NULL,
+    balance DOUBLE PRECISION NOT NULL,
+    total_trade DOUBLE PRECISION NOT NULL,
+    total_credit DOUBLE PRECISION NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_merchant_balance_snapshots_merchant_sequence
+    ON merchant_balance_snapshots (merchant_id, ledger_sequence);
+
+COMMIT;
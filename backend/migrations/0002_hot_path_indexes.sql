@@ -0,0 +1,39 @@
+-- Secondary indexes for the hot query paths.
+-- Fresh databases get these from db.create_all(). On an existing PostgreSQL
+-- database run this file outside a transaction (CONCURRENTLY does not block
+-- writes while the index builds):
+--   psql "$DATABASE_URL" -f migrations/0002_hot_path_indexes.sql
+
+-- Merchant lists and tenant ownership checks
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_merchants_user_id
+    ON merchants (user_id);
+
+-- Bill list keyset pagination (user_id, created_at DESC, id DESC) and date ranges
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bills_user_id_created_at_id
+    ON bills (user_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bills_merchant_id
+    ON bills (merchant_id);
+
+-- Serialising and editing a bill's items; merchant trades and statements
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bill_items_bill_id
+    ON bill_items (bill_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bill_items_merchant_id
+    ON bill_items (merchant_id);
+
+-- Credit history and opening-balance lookups per merchant
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_merchant_id_transaction_type
+    ON transactions (merchant_id, transaction_type);
+
+-- Income reports by tenant/merchant and date; bill edits and deletes
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_adhatiya_income_user_id_date
+    ON adhatiya_income (user_id, date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_adhatiya_income_merchant_id_date
+    ON adhatiya_income (merchant_id, date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_adhatiya_income_bill_id
+    ON adhatiya_income (bill_id);
+
+ANALYZE merchants;
+ANALYZE bills;
+ANALYZE bill_items;
+ANALYZE transactions;
+ANALYZE adhatiya_income;
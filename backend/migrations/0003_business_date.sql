@@ -0,0 +1,36 @@
+-- Stored trading day on bills and bill items, so daily reports are index
+-- range scans instead of date(created_at) over whole tables.
+-- The backfill assumes the defaults MANDI_TIMEZONE=Asia/Kolkata and
+-- BUSINESS_DAY_CUTOFF_HOUR=0; edit the two expressions below if the
+-- deployment is configured differently.
+--   psql "$DATABASE_URL" -f migrations/0003_business_date.sql
+
+BEGIN;
+
+ALTER TABLE bills ADD COLUMN IF NOT EXISTS business_date DATE;
+ALTER TABLE bill_items ADD COLUMN IF NOT EXISTS business_date DATE;
+
+UPDATE bills
+SET business_date = ((created_at AT TIME ZONE 'UTC') AT TIME ZONE 'Asia/Kolkata' - INTERVAL '0 hours')::date
+WHERE business_date IS NULL;
+
+UPDATE bill_items bi
+SET business_date = b.business_date
+FROM bills b
+WHERE b.id = bi.bill_id AND bi.business_date IS NULL;
+
+-- Adhatiya income used to be dated by UTC day; move it onto the bill's trading day
+UPDATE adhatiya_income ai
+SET date = b.business_date
+FROM bills b
+WHERE b.id = ai.bill_id AND ai.date IS DISTINCT FROM b.business_date;
+
+ALTER TABLE bills ALTER COLUMN business_date SET NOT NULL;
+ALTER TABLE bill_items ALTER COLUMN business_date SET NOT NULL;
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bills_user_id_business_date
+    ON bills (user_id, business_date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bill_items_business_date_merchant_id
+    ON bill_items (business_date, merchant_id);
@@ -0,0 +1,53 @@
+-- Pre-aggregated adhatiya income per (user, period, period start, merchant).
+-- The backfill assumes MANDI_SEASON_START_MONTHS=4,10; with a different
+-- setting skip the INSERT below and run `flask --app run rebuild-income`.
+--   psql "$DATABASE_URL" -f migrations/0004_income_rollups.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS income_rollups (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    period VARCHAR(10) NOT NULL,
+    period_start DATE NOT NULL,
+    merchant_id INTEGER NOT NULL REFERENCES merchants (id) ON DELETE CASCADE,
+    trade_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    commission_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    entries INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT uq_income_rollups_key UNIQUE (user_id, period, period_start, merchant_id)
+);
+
+DELETE FROM income_rollups;
+
+WITH daily AS (
+    SELECT user_id, merchant_id, date,
+           SUM(trade_amount) AS trade_amount,
+           SUM(commission_amount) AS commission_amount,
+           COUNT(*) AS entries
+    FROM adhatiya_income
+    WHERE merchant_id IS NOT NULL AND date IS NOT NULL
+    GROUP BY user_id, merchant_id, date
+), periods AS (
+    SELECT user_id, merchant_id, 'day' AS period, date AS period_start, trade_amount, commission_amount, entries
+    FROM daily
+    UNION ALL
+    SELECT user_id, merchant_id, 'month', date_trunc('month', date)::date, trade_amount, commission_amount, entries
+    FROM daily
+    UNION ALL
+    SELECT user_id, merchant_id, 'season',
+           CASE
+               WHEN EXTRACT(MONTH FROM date) >= 10 THEN make_date(EXTRACT(YEAR FROM date)::int, 10, 1)
+               WHEN EXTRACT(MONTH FROM date) >= 4 THEN make_date(EXTRACT(YEAR FROM date)::int, 4, 1)
+               ELSE make_date(EXTRACT(YEAR FROM date)::int - 1, 10, 1)
+           END,
+           trade_amount, commission_amount, entries
+    FROM daily
+)
+INSERT INTO income_rollups (user_id, period, period_start, merchant_id, trade_amount, commission_amount, entries)
+SELECT user_id, period, period_start, merchant_id, SUM(trade_amount), SUM(commission_amount), SUM(entries)
+FROM periods
+GROUP BY user_id, period, period_start, merchant_id;
+
+COMMIT;
+
+ANALYZE income_rollups;
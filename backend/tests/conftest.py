@@ -0,0 +1,30 @@
+import os
+import pytest
+
+# Tests build the app against a scratch database: TEST_DATABASE_URL when set
+# (e.g. a throwaway PostgreSQL database), otherwise a fresh SQLite file.
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', os.environ.get('TEST_DATABASE_URL') or f"sqlite:///{tmp_path / 'test.db'}")
+    from app import create_app
+    return create_app()
+
+@pytest.fixture
+def tokens(app):
+    """Register a user on empty tables and log in: the login response (access_token, refresh_token, user)."""
+    from app.models.models import db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    client = app.test_client()
+    client.post('/api/auth/register', json={'company_name': 'Co', 'email': 'test@mandi.test', 'mobile': '1',
+                                            'password': 'pw'})
+    return client.post('/api/auth/login', json={'email': 'test@mandi.test', 'password': 'pw'}).get_json()
+
+@pytest.fixture
+def client(app, tokens):
+    """Test client sending the logged-in user's access token."""
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {tokens['access_token']}"
+    return client
@@ -0,0 +1,25 @@
+from app.models.models import RefreshToken
+
+def refresh(client, token):
+    return client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {token}'})
+
+def test_logout_revokes_the_refresh_token_family(app, tokens):
+    client = app.test_client()
+    rotated = refresh(client, tokens['refresh_token']).get_json()
+
+    response = client.post('/api/auth/logout', headers={'Authorization': f"Bearer {rotated['refresh_token']}"})
+
+    assert response.status_code == 200
+    assert refresh(client, rotated['refresh_token']).status_code == 401
+    with app.app_context():
+        family = RefreshToken.query.all()
+        assert len(family) == 2
+        assert all(record.revoked_at is not None for record in family)
+
+def test_logout_needs_the_refresh_token(app, tokens):
+    client = app.test_client()
+
+    response = client.post('/api/auth/logout', headers={'Authorization': f"Bearer {tokens['access_token']}"})
+
+    assert response.status_code == 422
+    assert refresh(client, tokens['refresh_token']).status_code == 200
@@ -0,0 +1,75 @@
+import io
+import json
+import pytest
+from app.bills import routes as bill_routes
+from app.models.models import db, Merchant, MerchantLedger, User
+
+def jsonl(count):
+    bill = {'farmer_name': 'Ram', 'village_name': 'Sanwer',
+            'items': [{'vegetable': 'Onion', 'bags': 2, 'weight': 100, 'rate': 10, 'amount': 1000}]}
+    return ''.join(json.dumps(bill) + '\n' for _ in range(count)).encode()
+
+def post_import(client, body):
+    stream = io.BytesIO(body)
+    response = client.post('/api/bills/import', input_stream=stream, content_type='application/x-ndjson',
+                           headers={'Content-Length': str(len(body))})
+    return response, stream.tell()
+
+def test_import_stops_reading_past_the_row_limit(client, monkeypatch):
+    monkeypatch.setattr(bill_routes, 'BULK_IMPORT_MAX_BILLS', 10)
+    body = jsonl(5000)
+
+    response, read = post_import(client, body)
+
+    assert response.status_code == 413
+    assert read < len(body)
+    assert client.get('/api/bills').get_json()['bills'] == []
+
+def test_import_rejects_oversized_body_before_parsing(client, monkeypatch):
+    monkeypatch.setattr(bill_routes, 'BULK_IMPORT_MAX_BYTES', 1024)
+    body = jsonl(50)
+
+    response, read = post_import(client, body)
+
+    assert response.status_code == 413
+    assert read == 0
+
+def test_import_within_limits(client):
+    response, _ = post_import(client, jsonl(3))
+
+    assert response.status_code == 201
+    assert response.get_json()['imported'] == 3
+
+def test_import_posts_one_rounded_ledger_entry_per_bill(app, client):
+    merchant = client.post('/api/merchants', json={'name': 'Gupta Traders', 'mobile': '9'}).get_json()['merchant']
+    items = [{'vegetable': 'Onion', 'bags': 1, 'weight': 1, 'rate': 1, 'amount': amount, 'merchant_id': merchant['id']}
+             for amount in (0.1, 0.2)]
+    body = ''.join(json.dumps({'farmer_name': f'F{n}', 'village_name': 'V', 'items': items}) + '\n'
+                   for n in range(3)).encode()
+
+    response, _ = post_import(client, body)
+
+    assert response.status_code == 201
+    bill_ids = [bill['id'] for bill in response.get_json()['bills']]
+    with app.app_context():
+        entries = MerchantLedger.query.filter_by(merchant_id=merchant['id'], entry_type='trade') \
+            .order_by(MerchantLedger.sequence).all()
+        assert [(entry.bill_id, entry.debit) for entry in entries] == [(bill_id, 0.3) for bill_id in bill_ids]
+        assert db.session.get(Merchant, merchant['id']).total_trade == pytest.approx(0.9)
+
+def test_import_rejects_other_users_bill_merchant(app, client):
+    with app.app_context():
+        other = User(company_name='Other', email='other@mandi.test', mobile='2', password='x')
+        db.session.add(other)
+        db.session.flush()
+        foreign = Merchant(user_id=other.id, name='Not yours', mobile='3')
+        db.session.add(foreign)
+        db.session.commit()
+        foreign_id = foreign.id
+    bill = {'farmer_name': 'Ram', 'village_name': 'Sanwer', 'merchant_id': foreign_id, 'items': []}
+    body = (json.dumps(bill) + '\n' + json.dumps({**bill, 'merchant_id': 'x'}) + '\n').encode()
+
+    response, _ = post_import(client, body)
+
+    assert response.status_code == 400
+    assert [error['row'] for error in response.get_json()['errors']] == [1, 2]
@@ -0,0 +1,18 @@
+from app.models.models import db
+from benchmarks.concurrency import run_writers, sqlite_immediate_transactions
+from benchmarks.loader import sqlite_foreign_keys
+from benchmarks.seed import seed
+
+def test_parallel_bill_writers_on_shared_merchants(app):
+    with app.app_context():
+        sqlite_foreign_keys(db.engine)
+        sqlite_immediate_transactions(db.engine)
+        db.drop_all()
+        db.create_all()
+        seeded = seed(users=1, merchants_per_user=4, bills_per_user=20)
+
+    result = run_writers(app, seeded, threads=6, bills=5, merchants=4)
+
+    assert result['errors'] == []
+    assert result['mismatches'] == []
+    assert result['bills'] == 30
@@ -0,0 +1,15 @@
+from datetime import datetime
+from app.utils.helpers import business_date
+
+def test_farmers_default_to_the_current_trading_day(app, client):
+    # 01:00 IST on the 18th is 19:30 UTC on the 17th; with a 4 o'clock cutoff it still books to the 17th
+    app.config.update(MANDI_TIMEZONE='Asia/Kolkata', BUSINESS_DAY_CUTOFF_HOUR=4)
+    with app.app_context():
+        assert business_date(datetime(2026, 10, 17, 19, 30)).isoformat() == '2026-10-17'
+        today = business_date().isoformat()
+
+    response = client.get('/api/farmers/')
+
+    assert response.status_code == 200
+    assert response.get_json()['date'] == today
+    assert client.get('/api/farmers/', query_string={'date': '2026-01-02'}).get_json()['date'] == '2026-01-02'
@@ -0,0 +1,44 @@
+import pytest
+from app.models.models import db, IncomeRollup
+from app.utils.income import rebuild_income_rollups
+
+def rollups(user_id):
+    return {
+        (row.period, row.period_start, row.merchant_id): (row.trade_amount, row.commission_amount, row.entries)
+        for row in IncomeRollup.query.filter_by(user_id=user_id)
+    }
+
+def test_maintained_rollups_match_a_rebuild(app, client, tokens):
+    a, b, c, d = (client.post('/api/merchants', json={'name': name, 'mobile': '9'}).get_json()['merchant']['id']
+               for name in ('A', 'B', 'C', 'D'))
+
+    def line(merchant_id, amount, **extra):
+        return {'vegetable': 'Onion', 'bags': 1, 'weight': 10, 'rate': 10, 'amount': amount,
+                'merchant_id': merchant_id, **extra}
+
+    bills = [client.post('/api/bills', json={'farmer_name': f'F{n}', 'village_name': 'V', 'items': items}).get_json()
+             for n, items in enumerate([[line(a, 100.1), line(b, 200)], [line(a, 50), line(c, 75.35)], [line(c, 10), line(d, 10)]])]
+
+    first, second, third = bills
+    # Reprice one item and move the other to a new merchant
+    assert client.put(f"/api/bills/{first['id']}", json={'items': [
+        line(a, 120.4, id=first['items'][0]['id']), line(c, 200, id=first['items'][1]['id'])
+    ]}).status_code == 200
+    # Drop an item and add one
+    assert client.put(f"/api/bills/{second['id']}", json={'items': [
+        line(a, 50, id=second['items'][0]['id']), line(b, 33.3)
+    ]}).status_code == 200
+    # D only traded on this bill, so its rollup rows must go with it
+    assert client.delete(f"/api/bills/{third['id']}").status_code == 200
+
+    user_id = tokens['user']['id']
+    with app.app_context():
+        maintained = rollups(user_id)
+        rebuild_income_rollups(user_id)
+        db.session.commit()
+        rebuilt = rollups(user_id)
+
+    assert maintained.keys() == rebuilt.keys()
+    for key, (trade, commission, entries) in rebuilt.items():
+        assert maintained[key] == (pytest.approx(trade), pytest.approx(commission), entries), key
+    assert {merchant_id for _, _, merchant_id in rebuilt} == {a, b, c}
@@ -0,0 +1,12 @@
+def test_metrics_closed_without_a_token(app):
+    assert app.test_client().get('/api/metrics').status_code == 404
+
+def test_metrics_need_the_configured_token(app):
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    client = app.test_client()
+
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert 'mandi_http_request_duration_seconds' in response.get_data(as_text=True)
@@ -0,0 +1,18 @@
+from app.models.models import db
+from benchmarks.loader import sqlite_foreign_keys
+from benchmarks.query_plans import check_plans, record_statements
+from benchmarks.seed import seed
+
+def test_routes_use_indexes(app):
+    with app.app_context():
+        sqlite_foreign_keys(db.engine)
+        db.drop_all()
+        db.create_all()
+        seeded = seed(merchants_per_user=20, bills_per_user=200)
+
+    recorder = record_statements(app, seeded)
+    with app.app_context():
+        failures = check_plans(recorder, db.engine)
+
+    assert recorder.statements
+    assert failures == [], '\n'.join(f'{route}: {", ".join(tables)}' for route, tables, _ in failures)
@@ -0,0 +1,45 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import pytest
+from app.utils import responses
+
+PAYLOAD = {
+    'id': 7,
+    'date': datetime(2026, 10, 18, 9, 5, 3, 120),
+    'created_at': datetime(2026, 1, 1, tzinfo=timezone.utc),
+    'business_date': date(2026, 1, 2),
+    'amount': Decimal('1.5'),
+    'village_name': 'नासिक',
+    'items': [{'rate': 20.0, 'bags': None, 'paid': True}]
+}
+
+def test_json_matches_with_and_without_orjson(app, monkeypatch):
+    with app.test_request_context():
+        encoded = app.json.dumps(PAYLOAD), app.json.response(PAYLOAD).get_data()
+        monkeypatch.setattr(responses, 'orjson', None)
+        fallback = app.json.dumps(PAYLOAD), app.json.response(PAYLOAD).get_data()
+
+    assert fallback == encoded
+    assert app.json.loads(encoded[0])['date'] == '2026-10-18T09:05:03.000120'
+
+def failing_rows(good):
+    yield from ({'id': n} for n in range(good))
+    raise RuntimeError('connection lost')
+
+def test_stream_failing_before_first_batch_is_an_error_status(client, monkeypatch):
+    from app.income import routes as income_routes
+    monkeypatch.setattr(income_routes, 'streamed', lambda query, scalars=False: failing_rows(0))
+
+    response = client.get('/api/income/')
+
+    assert response.status_code == 500
+    assert response.get_json() == {'message': 'connection lost'}
+
+def test_stream_failing_mid_body_does_not_end_the_json(app):
+    with app.test_request_context():
+        response = responses.stream_json(failing_rows(3), key='incomes', batch_size=2, total_income=0.0)
+        chunks = response.response
+        assert next(chunks) == '{"total_income":0.0,"incomes":['
+        assert next(chunks) == '{"id":0},{"id":1}'
+        with pytest.raises(RuntimeError):
+            list(chunks)
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+from app.models.models import db, Bill
+
+def day(days_ago):
+    return (datetime.utcnow() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+
+def test_opening_balance_follows_back_dated_edits(app, client):
+    merchant = client.post('/api/merchants', json={'name': 'Gupta Traders', 'mobile': '9'}).get_json()['merchant']
+    item = {'vegetable': 'Onion', 'bags': 1, 'weight': 10, 'rate': 10, 'amount': 100, 'merchant_id': merchant['id']}
+    bill = client.post('/api/bills', json={'farmer_name': 'Ram', 'village_name': 'Sanwer', 'items': [item]}).get_json()
+    with app.app_context():
+        db.session.get(Bill, bill['id']).created_at = datetime.utcnow() - timedelta(days=10)
+        db.session.commit()
+
+    # Edited today, but the trade still belongs to the bill's date
+    edited = {**item, 'id': bill['items'][0]['id'], 'amount': 300}
+    assert client.put(f"/api/bills/{bill['id']}", json={'items': [edited]}).status_code == 200
+
+    after = client.get(f"/api/merchants/{merchant['id']}/statement", query_string={'start_date': day(5)}).get_json()
+    assert after['opening_balance'] == 300
+    assert after['entries'] == []
+    assert after['closing_balance'] == after['balance'] == 300
+
+    spanning = client.get(f"/api/merchants/{merchant['id']}/statement",
+                          query_string={'start_date': day(11), 'end_date': day(10)}).get_json()
+    assert spanning['opening_balance'] == 0
+    assert [entry['debit'] for entry in spanning['entries']] == [300]
+    assert spanning['closing_balance'] == 300
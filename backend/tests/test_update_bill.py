@@ -0,0 +1,91 @@
+import pytest
+from app.models.models import db, AdhatiyaIncome, BillItem, DataVersion, Merchant, MerchantLedger
+
+@pytest.fixture
+def bill(client, tokens):
+    """A bill with Onion 100 on merchant A and Potato 200 on merchant B."""
+    a, b = (client.post('/api/merchants', json={'name': name, 'mobile': '9'}).get_json()['merchant']['id']
+            for name in ('A', 'B'))
+    created = client.post('/api/bills', json={'farmer_name': 'Ram', 'village_name': 'Sanwer', 'items': [
+        {'vegetable': 'Onion', 'bags': 1, 'weight': 10, 'rate': 10, 'amount': 100, 'merchant_id': a},
+        {'vegetable': 'Potato', 'bags': 2, 'weight': 20, 'rate': 10, 'amount': 200, 'merchant_id': b}
+    ]}).get_json()
+    return {**created, 'a': a, 'b': b, 'user_id': tokens['user']['id']}
+
+def edit(client, bill, items):
+    response = client.put(f"/api/bills/{bill['id']}", json={'items': items})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['bill']
+
+def item(bill, index, **changes):
+    return {**{k: bill['items'][index][k] for k in ('id', 'vegetable', 'bags', 'weight', 'rate', 'amount',
+                                                    'merchant_id')}, **changes}
+
+def state(app, bill):
+    """Ledger debits posted by edits (after the two from creation), adhatiya rows, balances, item ids
+    and the user's ledger data version."""
+    with app.app_context():
+        entries = MerchantLedger.query.filter_by(bill_id=bill['id']).order_by(MerchantLedger.id).all()
+        income = AdhatiyaIncome.query.filter_by(bill_id=bill['id']).all()
+        return {
+            'entries': [(entry.merchant_id, entry.debit) for entry in entries][2:],
+            'income': sorted((row.merchant_id, row.trade_amount) for row in income),
+            'balances': {m.id: m.current_balance for m in Merchant.query.filter(Merchant.id.in_((bill['a'], bill['b'])))},
+            'item_ids': sorted(row.id for row in BillItem.query.filter_by(bill_id=bill['id'])),
+            'ledger_version': db.session.get(DataVersion, (bill['user_id'], 'ledger')).version
+        }
+
+def test_changed_amount(app, client, bill):
+    edit(client, bill, [item(bill, 0, amount=150), item(bill, 1)])
+
+    after = state(app, bill)
+    assert after['entries'] == [(bill['a'], 50)]
+    assert after['income'] == [(bill['a'], 150), (bill['b'], 200)]
+    assert after['balances'] == {bill['a']: 150, bill['b']: 200}
+
+def test_changed_merchant(app, client, bill):
+    edit(client, bill, [item(bill, 0, merchant_id=bill['b']), item(bill, 1)])
+
+    after = state(app, bill)
+    assert after['entries'] == [(bill['a'], -100), (bill['b'], 100)]
+    assert after['income'] == [(bill['b'], 100), (bill['b'], 200)]
+    assert after['balances'] == {bill['a']: 0, bill['b']: 300}
+
+def test_removed_item(app, client, bill):
+    edit(client, bill, [item(bill, 0)])
+
+    after = state(app, bill)
+    assert after['entries'] == [(bill['b'], -200)]
+    assert after['income'] == [(bill['a'], 100)]
+    assert after['balances'] == {bill['a']: 100, bill['b']: 0}
+    assert after['item_ids'] == [bill['items'][0]['id']]
+
+def test_new_item(app, client, bill):
+    added = {'vegetable': 'Tomato', 'bags': 1, 'weight': 5, 'rate': 10, 'amount': 50, 'merchant_id': bill['a']}
+    edited = edit(client, bill, [item(bill, 0), item(bill, 1), added])
+
+    after = state(app, bill)
+    assert after['entries'] == [(bill['a'], 50)]
+    assert after['income'] == [(bill['a'], 50), (bill['a'], 100), (bill['b'], 200)]
+    assert after['balances'] == {bill['a']: 150, bill['b']: 200}
+    assert edited['grand_total'] == bill['grand_total'] + 50
+
+def test_string_ids_keep_items_and_ledger(app, client, bill):
+    before = state(app, bill)
+
+    edit(client, bill, [item(bill, 0, id=str(bill['items'][0]['id'])), item(bill, 1, id=str(bill['items'][1]['id']))])
+
+    after = state(app, bill)
+    assert after['item_ids'] == before['item_ids']
+    assert after['entries'] == []
+    assert after['income'] == before['income']
+    assert after['ledger_version'] == before['ledger_version']
+
+def test_edit_netting_to_zero_keeps_ledger_version(app, client, bill):
+    before = state(app, bill)
+
+    edit(client, bill, [item(bill, 0, vegetable='Garlic'), item(bill, 1)])
+
+    after = state(app, bill)
+    assert after['entries'] == []
+    assert after['ledger_version'] == before['ledger_version']
@@ -0,0 +1,75 @@
+import pytest
+
+@pytest.fixture
+def bill(client):
+    merchant = client.post('/api/merchants', json={'name': 'A', 'mobile': '9', 'opening_balance': 50}) \
+        .get_json()['merchant']
+    created = client.post('/api/bills', json={'farmer_name': 'Ram', 'village_name': 'Sanwer', 'items': [
+        {'vegetable': 'Onion', 'bags': 1, 'weight': 10, 'rate': 10, 'amount': 100, 'merchant_id': merchant['id']}
+    ]}).get_json()
+    return {**created, 'merchant': merchant}
+
+def etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+def revalidate(client, url, tag):
+    return client.get(url, headers={'If-None-Match': tag}).status_code
+
+def put_ok(client, url, payload):
+    response = client.put(url, json=payload)
+    assert response.status_code == 200, response.get_json()
+
+def test_matching_etag_gets_304(client, bill):
+    tag = etag(client, '/api/bills')
+    response = client.get('/api/bills', headers={'If-None-Match': tag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == tag
+    assert response.get_data() == b''
+
+def test_noop_bill_edit_keeps_etags(client, bill):
+    urls = ('/api/bills', '/api/merchants')
+    tags = {url: etag(client, url) for url in urls}
+    items = [{k: bill['items'][0][k] for k in ('id', 'vegetable', 'bags', 'weight', 'rate', 'amount', 'merchant_id')}]
+
+    put_ok(client, f"/api/bills/{bill['id']}", {'farmer_name': 'Ram', 'items': items})
+    assert {url: revalidate(client, url, tag) for url, tag in tags.items()} == {url: 304 for url in urls}
+
+    put_ok(client, f"/api/bills/{bill['id']}", {'farmer_name': 'Shyam', 'items': items})
+    assert revalidate(client, '/api/bills', tags['/api/bills']) == 200
+    # Only the bill row changed, so balances are still cached
+    assert revalidate(client, '/api/merchants', tags['/api/merchants']) == 304
+
+def test_noop_merchant_edit_keeps_etags(client, bill):
+    merchant = bill['merchant']
+    url = f"/api/merchants/{merchant['id']}"
+    tag = etag(client, url)
+
+    put_ok(client, url, {'name': 'A', 'mobile': '9', 'opening_balance': 50})
+    assert revalidate(client, url, tag) == 304
+
+    put_ok(client, url, {'opening_balance': 75})
+    assert revalidate(client, url, tag) == 200
+
+def test_noop_credit_edit_keeps_etags(client, bill):
+    merchant_id = bill['merchant']['id']
+    credit = client.post(f'/api/merchants/{merchant_id}/credit', json={'amount': 40, 'payment_mode': 'Cash'}) \
+        .get_json()['transaction']
+    url = f'/api/merchants/{merchant_id}/ledger'
+    tag = etag(client, url)
+
+    put_ok(client, f"/api/merchants/{merchant_id}/credit/{credit['id']}", {'amount': 40, 'payment_mode': 'Cash'})
+    assert revalidate(client, url, tag) == 304
+
+    put_ok(client, f"/api/merchants/{merchant_id}/credit/{credit['id']}", {'amount': 30})
+    assert revalidate(client, url, tag) == 200
+
+def test_noop_profile_edit_keeps_etag(client):
+    tag = etag(client, '/api/auth/profile')
+
+    put_ok(client, '/api/auth/profile', {'company_name': 'Co', 'mobile': '1'})
+    assert revalidate(client, '/api/auth/profile', tag) == 304
+
+    put_ok(client, '/api/auth/profile', {'company_name': 'Co', 'address': 'Main Mandi Road'})
+    assert revalidate(client, '/api/auth/profile', tag) == 200
@@ -1,12 +1,19 @@
 import React from 'react'
 import { Link, useNavigate } from 'react-router-dom'
 import { Navbar as BSNavbar, Container, Nav, Button } from 'react-bootstrap'
+import { authAPI } from '../services/api'
 
 function Navbar() {
   const navigate = useNavigate()
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    try {
+      await authAPI.logout()
+    } catch (err) {
+      console.error('Failed to revoke session')
+    }
     localStorage.removeItem('token')
+    localStorage.removeItem('refresh_token')
     localStorage.removeItem('user')
     navigate('/login')
   }
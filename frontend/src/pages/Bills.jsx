@@ -4,8 +4,15 @@ import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import { billsAPI, merchantsAPI } from '../services/api';
 
+// Only the columns the table shows; items and merchants are not loaded
+const LIST_PARAMS = {
+  fields: 'id,bill_number,farmer_name,village_name,total_bags,total_weight,grand_total,created_at',
+  include: ''
+};
+
 function Bills() {
   const [bills, setBills] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [merchants, setMerchants] = useState([]);
   const [filters, setFilters] = useState({
     start_date: '',
@@ -30,10 +37,12 @@ function Bills() {
     return () => clearTimeout(delayDebounce);
   }, [filters]);
 
-  const loadBills = async () => {
+  const loadBills = async (cursor = null) => {
     try {
-      const response = await billsAPI.getAll(filters);
-      setBills(response.data);
+      const params = cursor ? { ...filters, ...LIST_PARAMS, cursor } : { ...filters, ...LIST_PARAMS };
+      const response = await billsAPI.getAll(params);
+      setBills(cursor ? [...bills, ...response.data.bills] : response.data.bills);
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       setError('Failed to load bills');
     }
@@ -41,7 +50,7 @@ function Bills() {
 
   const loadMerchants = async () => {
     try {
-      const response = await merchantsAPI.getAll();
+      const response = await merchantsAPI.getDirectory();
       setMerchants(response.data);
     } catch (err) {
       console.error('Failed to load merchants');
@@ -64,11 +73,17 @@ function Bills() {
   };
 
   // ✅ UPDATED PRINT FUNCTION — No navigation, no new tab
-  const handlePrint = async (id) => {
+  const handlePrint = async (id) => printDocument(() => billsAPI.print(id));
+
+  // Prints every bill of the selected start date (today if none) as one document
+  const handlePrintDay = async () =>
+    printDocument(() => billsAPI.printBatch({ date: filters.start_date || undefined }));
+
+  const printDocument = async (loadHTML) => {
   try {
     // 1. Get the HTML string directly
     //    'response' is now 'printHTML'
-    const printHTML = await billsAPI.print(id);
+    const printHTML = await loadHTML();
 
     // 2. Check if we got valid HTML
     if (typeof printHTML !== 'string' || printHTML.length === 0) {
@@ -117,9 +132,14 @@ function Bills() {
       <Container className="mt-4">
         <div className="d-flex justify-content-between align-items-center mb-4">
           <h2>Bills Management</h2>
-          <Button variant="primary" onClick={() => navigate('/bills/create')}>
-            Create New Bill
-          </Button>
+          <div>
+            <Button variant="outline-secondary" className="me-2" onClick={handlePrintDay}>
+              Print Day's Bills
+            </Button>
+            <Button variant="primary" onClick={() => navigate('/bills/create')}>
+              Create New Bill
+            </Button>
+          </div>
         </div>
 
         {error && <Alert variant="danger">{error}</Alert>}
@@ -226,6 +246,14 @@ function Bills() {
           </tbody>
         </Table>
 
+        {nextCursor && (
+          <div className="text-center mb-4">
+            <Button variant="outline-primary" onClick={() => loadBills(nextCursor)}>
+              Load More
+            </Button>
+          </div>
+        )}
+
         {bills.length === 0 && (
           <div className="text-center py-5">
             <p>No bills found</p>
@@ -36,7 +36,7 @@ function CreateBill() {
 
   const loadMerchants = async () => {
     try {
-      const response = await merchantsAPI.getAll()
+      const response = await merchantsAPI.getDirectory()
       setMerchants(response.data)
     } catch (err) {
       setError('Failed to load merchants')
@@ -42,6 +42,7 @@ function EditBill() {
         other_charges: bill.other_charges
       })
       setItems(bill.items.map(item => ({
+        id: item.id,
         vegetable: item.vegetable,
         // quantity: item.quantity,
         bags: item.bags,
@@ -57,7 +58,7 @@ function EditBill() {
 
   const loadMerchants = async () => {
     try {
-      const response = await merchantsAPI.getAll()
+      const response = await merchantsAPI.getDirectory()
       setMerchants(response.data)
     } catch (err) {
       console.error('Failed to load merchants')
@@ -125,6 +126,7 @@ function EditBill() {
       const billData = {
         ...formData,
         items: items.map(item => ({
+          id: item.id,
           vegetable: item.vegetable,
           // quantity: parseFloat(item.quantity),
           bags: parseInt(item.bags),
@@ -1,23 +1,30 @@
 import React, { useState, useEffect } from 'react'
-import { Container, Table, Form, Row, Col, Card, Alert } from 'react-bootstrap'
+import { Container, Table, Form, Row, Col, Card, Alert, Button } from 'react-bootstrap'
 import Navbar from '../components/Navbar'
 import { farmersAPI } from '../services/api'
 
 function Farmers() {
   const [farmers, setFarmers] = useState([])
   const [summary, setSummary] = useState({})
-  const [date, setDate] = useState(new Date().toISOString().split('T')[0])
+  const [nextCursor, setNextCursor] = useState(null)
+  // Empty until a date is picked: the server then reports its current trading day
+  // (IST, with the early-morning cutoff), which the browser's clock cannot work out
+  const [date, setDate] = useState('')
+  const [reportDate, setReportDate] = useState('')
   const [error, setError] = useState('')
 
   useEffect(() => {
     loadFarmers()
   }, [date])
 
-  const loadFarmers = async () => {
+  const loadFarmers = async (cursor = null) => {
     try {
-      const response = await farmersAPI.getAll(date)
-      setFarmers(response.data.farmers)
+      // Later pages stay on the day the first page reported, even across the cutoff
+      const response = await farmersAPI.getAll(date || (cursor ? reportDate : undefined), cursor)
+      setReportDate(response.data.date)
+      setFarmers(cursor ? [...farmers, ...response.data.farmers] : response.data.farmers)
       setSummary(response.data.summary)
+      setNextCursor(response.data.next_cursor)
     } catch (err) {
       setError('Failed to load farmers data')
     }
@@ -37,7 +44,7 @@ function Farmers() {
               <Form.Label>Select Date</Form.Label>
               <Form.Control
                 type="date"
-                value={date}
+                value={date || reportDate}
                 onChange={(e) => setDate(e.target.value)}
               />
             </Form.Group>
@@ -108,6 +115,14 @@ function Farmers() {
           </tbody>
         </Table>
 
+        {nextCursor && (
+          <div className="text-center mb-4">
+            <Button variant="outline-primary" onClick={() => loadFarmers(nextCursor)}>
+              Load More
+            </Button>
+          </div>
+        )}
+
         {farmers.length === 0 && (
           <div className="text-center py-5">
             <p>No farmer records found for this date</p>
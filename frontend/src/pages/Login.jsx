@@ -22,6 +22,7 @@ function Login({ setAuth }) {
       const response = await authAPI.login(formData)
       console.log("response",response)
       localStorage.setItem('token', response.data.access_token)
+      localStorage.setItem('refresh_token', response.data.refresh_token)
       console.log("localstorage ", localStorage)
       localStorage.setItem('user', JSON.stringify(response.data.user))
       setAuth(true)
@@ -4,12 +4,15 @@ import { useParams, useNavigate } from 'react-router-dom'
 import Navbar from '../components/Navbar'
 import { merchantsAPI } from '../services/api'
 
+const STATEMENT_PAGE = 100
+
 function MerchantProfile() {
   const { id } = useParams()
   const navigate = useNavigate()
   const [merchant, setMerchant] = useState(null)
-  const [trades, setTrades] = useState([])
-  const [transactions, setTransactions] = useState([])
+  const [totals, setTotals] = useState({ total_trade: 0, total_credit: 0, balance: 0 })
+  const [entries, setEntries] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
   const [showCreditModal, setShowCreditModal] = useState(false)
   const [editingTransaction, setEditingTransaction] = useState(null)
   const [creditData, setCreditData] = useState({
@@ -24,12 +27,18 @@ function MerchantProfile() {
     loadMerchantData()
   }, [id])
 
-  const loadMerchantData = async () => {
+  // Statement pages come oldest first; later pages are appended
+  const loadMerchantData = async (cursor = null) => {
     try {
-      const response = await merchantsAPI.getById(id)
+      const response = await merchantsAPI.getStatement(id, cursor ? { limit: STATEMENT_PAGE, cursor } : { limit: STATEMENT_PAGE })
       setMerchant(response.data.merchant)
-      setTrades(response.data.trades)
-      setTransactions(response.data.transactions)
+      setTotals({
+        total_trade: response.data.total_trade,
+        total_credit: response.data.total_credit,
+        balance: response.data.balance
+      })
+      setEntries(cursor ? [...entries, ...response.data.entries] : response.data.entries)
+      setNextCursor(response.data.next_cursor)
     } catch (err) {
       setError('Failed to load merchant data')
     }
@@ -48,7 +57,7 @@ function MerchantProfile() {
   const openEditCreditModal = (transaction) => {
     setEditingTransaction(transaction)
     setCreditData({
-      amount: transaction.amount,
+      amount: transaction.credit,
       payment_mode: transaction.payment_mode,
       description: transaction.description || ''
     })
@@ -90,9 +99,11 @@ function MerchantProfile() {
     }
   }
 
-  const totalTrade = trades.reduce((sum, trade) => sum + trade.amount, 0)
-  const totalCredit = transactions.reduce((sum, t) => sum + (t.transaction_type === 'credit' ? t.amount : 0), 0)
-  const balance = totalTrade - totalCredit
+  const trades = entries.filter((entry) => entry.type === 'trade')
+  const transactions = entries.filter((entry) => entry.type === 'credit')
+  const totalTrade = totals.total_trade
+  const totalCredit = totals.total_credit
+  const balance = totals.balance
   const commission = totalTrade * 0.02
 
   if (!merchant) return <div>Loading...</div>
@@ -174,7 +185,7 @@ function MerchantProfile() {
                     <td>{trade.weight}</td>
                     <td>{trade.bags}</td>
                     <td>₹{trade.rate}</td>
-                    <td>₹{trade.amount}</td>
+                    <td>₹{trade.debit}</td>
                   </tr>
                 ))}
               </tbody>
@@ -205,8 +216,8 @@ function MerchantProfile() {
               <tbody>
                 {transactions.map((transaction) => (
                   <tr key={transaction.id}>
-                    <td>{new Date(transaction.created_at).toLocaleDateString()}</td>
-                    <td>₹{transaction.amount}</td>
+                    <td>{new Date(transaction.date).toLocaleDateString()}</td>
+                    <td>₹{transaction.credit}</td>
                     <td>{transaction.payment_mode}</td>
                     <td>{transaction.description || '-'}</td>
                     <td>
@@ -225,6 +236,14 @@ function MerchantProfile() {
           </Card.Body>
         </Card>
 
+        {nextCursor && (
+          <div className="text-center my-4">
+            <Button variant="outline-primary" onClick={() => loadMerchantData(nextCursor)}>
+              Load More
+            </Button>
+          </div>
+        )}
+
         {/* Add/Edit Credit Modal */}
         <Modal show={showCreditModal} onHide={() => setShowCreditModal(false)}>
           <Modal.Header closeButton>
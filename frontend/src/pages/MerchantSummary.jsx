@@ -6,7 +6,9 @@ import { merchantsAPI } from '../services/api'
 function MerchantSummary() {
   const [summary, setSummary] = useState([])
   const [totals, setTotals] = useState({})
-  const [date, setDate] = useState(new Date().toISOString().split('T')[0])
+  // Empty until a date is picked: the server then reports its current trading day
+  const [date, setDate] = useState('')
+  const [reportDate, setReportDate] = useState('')
   const [error, setError] = useState('')
 
   useEffect(() => {
@@ -15,7 +17,8 @@ function MerchantSummary() {
 
   const loadSummary = async () => {
     try {
-      const response = await merchantsAPI.getSummary(date)
+      const response = await merchantsAPI.getSummary(date || undefined)
+      setReportDate(response.data.date)
       setSummary(response.data.summary)
       setTotals({
         grand_total: response.data.grand_total,
@@ -42,7 +45,7 @@ function MerchantSummary() {
               <Form.Label>Select Date</Form.Label>
               <Form.Control
                 type="date"
-                value={date}
+                value={date || reportDate}
                 onChange={(e) => setDate(e.target.value)}
               />
             </Form.Group>
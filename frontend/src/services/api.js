@@ -13,7 +13,8 @@ api.interceptors.request.use(
   (config) => {
     const token = localStorage.getItem('token')
     console.log("Attaching token to request:", token)
-    if (token) {
+    // Calls that bring their own token (logout sends the refresh token) keep it
+    if (token && !config.headers.Authorization) {
       config.headers.Authorization = `Bearer ${token}`
     }
     return config
@@ -23,16 +24,66 @@ api.interceptors.request.use(
   }
 )
 
+// On a 401, swap the refresh token for new tokens once and retry the request.
+// Concurrent failures share one refresh call, since each refresh token is single-use.
+let refreshing = null
+
+const refreshTokens = () => {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem('refresh_token')
+    refreshing = axios.post(`${API_URL}/auth/refresh`, null, {
+      headers: { Authorization: `Bearer ${refreshToken}` }
+    }).then(response => {
+      localStorage.setItem('token', response.data.access_token)
+      localStorage.setItem('refresh_token', response.data.refresh_token)
+      return response.data.access_token
+    }).finally(() => {
+      refreshing = null
+    })
+  }
+  return refreshing
+}
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config
+    const isAuthCall = original?.url?.startsWith('/auth/')
+    if (error.response?.status !== 401 || !original || original._retried || isAuthCall ||
+        !localStorage.getItem('refresh_token')) {
+      return Promise.reject(error)
+    }
+    original._retried = true
+    try {
+      const token = await refreshTokens()
+      original.headers.Authorization = `Bearer ${token}`
+      return api(original)
+    } catch (refreshError) {
+      localStorage.removeItem('token')
+      localStorage.removeItem('refresh_token')
+      localStorage.removeItem('user')
+      window.location.href = '/login'
+      return Promise.reject(refreshError)
+    }
+  }
+)
+
 export const authAPI = {
   register: (data) => api.post('/auth/register', data),
   login: (data) => api.post('/auth/login', data),
+  logout: () => api.post('/auth/logout', null, {
+    headers: { Authorization: `Bearer ${localStorage.getItem('refresh_token')}` }
+  }),
   getProfile: () => api.get('/auth/profile'),
   updateProfile: (data) => api.put('/auth/profile', data)
 }
 
 export const merchantsAPI = {
   getAll: () => api.get('/merchants'),
+  // id, name and business_name only, for dropdowns (cached server-side, no balances)
+  getDirectory: () => api.get('/merchants/directory'),
   getById: (id) => api.get(`/merchants/${id}`),
+  getStatement: (id, params) => api.get(`/merchants/${id}/statement`, { params }),
   create: (data) => api.post('/merchants', data),
   update: (id, data) => api.put(`/merchants/${id}`, data),
   delete: (id) => api.delete(`/merchants/${id}`),
@@ -41,7 +92,7 @@ export const merchantsAPI = {
       api.put(`/merchants/${merchantId}/credit/${transactionId}`, data),
   deleteCredit: (merchantId, transactionId) => 
       api.delete(`/merchants/${merchantId}/credit/${transactionId}`),
-  getSummary: (date) => api.get('/merchants/summary', { params: { date } })
+  getSummary: (date) => api.get('/merchants/summary', { params: { date, include: 'items' } })
 }
 
 
@@ -49,16 +100,32 @@ export const billsAPI = {
   getAll: (params) => api.get('/bills', { params }),
   getById: (id) => api.get(`/bills/${id}`),
   create: (data) => api.post('/bills', data),
+  import: (content, format = 'jsonl') =>
+    api.post('/bills/import', content, {
+      params: { format },
+      headers: { 'Content-Type': format === 'csv' ? 'text/csv' : 'application/x-ndjson' }
+    }),
   update: (id, data) => api.put(`/bills/${id}`, data),
   delete: (id) => api.delete(`/bills/${id}`),
   print: (id) =>
     api.get(`/bills/print/${id}`, {
       responseType: "text",
     }).then(response => response.data),
+  // Raw ESC/POS bytes for thermal printers (e.g. handed to a print-service app)
+  printEscpos: (id) =>
+    api.get(`/bills/print/${id}`, {
+      params: { format: 'escpos' },
+      responseType: "arraybuffer",
+    }).then(response => response.data),
+  printBatch: (params) =>
+    api.get('/bills/print', {
+      params,
+      responseType: "text",
+    }).then(response => response.data),
 }
 
 export const farmersAPI = {
-  getAll: (date) => api.get('/farmers', { params: { date } })
+  getAll: (date, cursor) => api.get('/farmers', { params: { date, cursor } })
 }
 
 export const incomeAPI = {